@@ -1,6 +1,10 @@
 from django.contrib import admin
-from .models import Category,Tag, AuthorProfile, Image, ImageLike, ImageView, Comment
+from .models import Category,Tag, AuthorProfile, Image, ImageLike, ImageView, ImageDailyViews, Comment, ImageRendition, ProcessingJob
+from django.utils import timezone
 from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
+from .phash import exact_duplicate_groups, near_duplicate_pairs
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -22,13 +26,27 @@ class AuthorProfileAdmin(admin.ModelAdmin):
     list_filter = ("user",)
 
 
+class ImageRenditionInline(admin.TabularInline):
+    model = ImageRendition
+    extra = 0
+    can_delete = False
+    readonly_fields = ("width", "height", "format", "file")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Image)
 class ImageAdmin(admin.ModelAdmin):
-    list_display = ("title", "author", "category", "created_at", "file_size")
+    inlines = [ImageRenditionInline]
+    list_display = ("title", "author", "category", "created_at", "file_size",
+                    "likes_count", "views_count", "comments_count", "processing_status")
     search_fields = ("title", "description", "author__username")
-    list_filter = ("category", "author", "created_at")
+    list_filter = ("category", "author", "created_at", "processing_status")
 
-    readonly_fields = ("width", "height", "file_size", "slug", "created_at")
+    readonly_fields = ("width", "height", "file_size", "slug", "created_at",
+                       "likes_count", "views_count", "comments_count", "processing_status",
+                       "content_hash", "phash")
 
     # pour auto-compléter le slug quand tu tapes un titre
     prepopulated_fields = {"slug": ("title",)}
@@ -42,10 +60,39 @@ class ImageAdmin(admin.ModelAdmin):
             "fields": ("image",)
         }),
         ("Métadonnées (automatique)", {
-            "fields": ("width", "height", "file_size", "created_at"),
+            "fields": ("width", "height", "file_size", "created_at", "processing_status",
+                       "content_hash", "phash"),
+        }),
+        ("Compteurs (automatique)", {
+            "fields": ("likes_count", "views_count", "comments_count"),
         }),
     )
 
+    # lien vers le rapport des doublons au-dessus de la liste
+    change_list_template = "admin/gallery/image/change_list.html"
+
+    def get_urls(self):
+        return [
+            path("duplicates/", self.admin_site.admin_view(self.duplicates_view), name="gallery_image_duplicates"),
+        ] + super().get_urls()
+
+    def duplicates_view(self, request):
+        """Rapport : doublons exacts (même SHA-256) et images visuellement proches"""
+        try:
+            distance = int(request.GET.get("distance", ""))
+        except ValueError:
+            distance = None
+        pairs = near_duplicate_pairs(distance)
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Doublons",
+            "exact_groups": exact_duplicate_groups(),
+            "near_pairs": pairs,
+            "distance": distance,
+        }
+        return TemplateResponse(request, "admin/gallery/image/duplicates.html", context)
+
 
 @admin.register(ImageLike)
 class ImageLikeAdmin(admin.ModelAdmin):
@@ -59,6 +106,12 @@ class ImageViewAdmin(admin.ModelAdmin):
     list_filter = ['viewed_at']
     search_fields = ['user__username', 'image__title', 'ip_address']
 
+@admin.register(ImageDailyViews)
+class ImageDailyViewsAdmin(admin.ModelAdmin):
+    list_display = ['image', 'day', 'views']
+    list_filter = ['day']
+    search_fields = ['image__title']
+
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ['author', 'image', 'content_preview', 'created_at']
@@ -67,4 +120,20 @@ class CommentAdmin(admin.ModelAdmin):
     
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
-    content_preview.short_description = 'Contenu'
\ No newline at end of file
+    content_preview.short_description = 'Contenu'
+
+
+@admin.register(ProcessingJob)
+class ProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'image', 'status', 'attempts', 'max_attempts', 'run_after', 'updated_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['image__title', 'last_error']
+    readonly_fields = ['attempts', 'locked_at', 'last_error', 'created_at', 'updated_at']
+    actions = ['retry_jobs']
+
+    @admin.action(description="Relancer les tâches sélectionnées")
+    def retry_jobs(self, request, queryset):
+        count = queryset.exclude(status=ProcessingJob.STATUS_RUNNING).update(
+            status=ProcessingJob.STATUS_PENDING, attempts=0, run_after=timezone.now()
+        )
+        self.message_user(request, f"{count} tâche(s) relancée(s).")
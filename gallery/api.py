@@ -0,0 +1,96 @@
+"""API JSON en lecture seule des images (/api/images/).
+
+Le client choisit ses champs avec ?fields=slug,title,likes_count ; la
+requête ne charge que les colonnes, jointures (auteur, catégorie) et
+préchargements (tags, déclinaisons) de ces champs. Les compteurs viennent
+des colonnes dénormalisées likes_count/views_count/comments_count, sans
+COUNT par ligne : une page coûte une requête, plus une par préchargement.
+
+Les réponses portent un ETag calculé sur le corps JSON : un client qui
+renvoie If-None-Match reçoit un 304 sans corps si rien n'a changé.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+MAX_BATCH = 100  # slugs par appel de ?slugs=
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def _renditions(image, request):
+    return [
+        {'url': request.build_absolute_uri(r.file.url), 'width': r.width, 'height': r.height, 'format': r.format}
+        for r in image.renditions.all()
+    ]
+
+
+# champ : (colonnes pour only(), relation à joindre ou précharger, valeur)
+FIELDS = {
+    'slug': (('slug',), None, lambda image, request: image.slug),
+    'title': (('title',), None, lambda image, request: image.title),
+    'description': (('description',), None, lambda image, request: image.description),
+    'url': (('slug',), None, lambda image, request: request.build_absolute_uri(
+        reverse('image_detail', args=[image.slug]))),
+    'image': (('image',), None, lambda image, request: request.build_absolute_uri(image.image.url)),
+    'width': (('width',), None, lambda image, request: image.width),
+    'height': (('height',), None, lambda image, request: image.height),
+    'created_at': (('created_at',), None, lambda image, request: image.created_at),
+    'author': (('author__username',), 'author', lambda image, request: image.author.username),
+    'category': (('category__slug',), 'category',
+                 lambda image, request: image.category.slug if image.category_id else None),
+    'tags': ((), 'tags', lambda image, request: [tag.name for tag in image.tags.all()]),
+    'likes_count': (('likes_count',), None, lambda image, request: image.likes_count),
+    'views_count': (('views_count',), None, lambda image, request: image.views_count),
+    'comments_count': (('comments_count',), None, lambda image, request: image.comments_count),
+    'renditions': ((), 'renditions', _renditions),
+}
+JOINED = {'author', 'category'}  # select_related ; les autres relations sont préchargées
+
+
+def parse_fields(value):
+    """Champs demandés (?fields=), dans l'ordre de FIELDS ; tous par défaut"""
+    if not value:
+        return list(FIELDS)
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested - set(FIELDS)
+    if unknown:
+        raise InvalidFields(', '.join(sorted(unknown)))
+    return [name for name in FIELDS if name in requested]
+
+
+def select_fields(queryset, fields):
+    """Restreindre le queryset aux colonnes et relations des champs demandés"""
+    # clés de pagination, de lot (?slugs=) et de relations toujours chargées
+    columns = {'id', 'created_at', 'slug', 'category_id', 'author_id'}
+    for name in fields:
+        field_columns, relation, _ = FIELDS[name]
+        columns.update(field_columns)
+        if relation in JOINED:
+            queryset = queryset.select_related(relation)
+        elif relation:
+            queryset = queryset.prefetch_related(relation)
+    return queryset.only(*columns)
+
+
+def serialize(image, fields, request):
+    return {name: FIELDS[name][2](image, request) for name in fields}
+
+
+def json_response(request, data, status=200):
+    """Réponse JSON avec ETag ; 304 si If-None-Match correspond"""
+    content = json.dumps(data, cls=DjangoJSONEncoder)
+    etag = f'"{hashlib.md5(content.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json', status=status)
+    response['ETag'] = etag
+    # stockable, mais toujours revalidé : l'ETag rend la revalidation peu coûteuse
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,14 @@
+"""Mesures de performance de la galerie.
+
+- data.py : jeu de données synthétique (utilisateurs, catégories, tags,
+  images PIL minuscules, likes, vues, commentaires) à une échelle donnée ;
+- runner.py : passe les vues principales au client de test et relève
+  nombre de requêtes SQL, latence p50/p95 et pic de mémoire ;
+- budgets.json : budgets versionnés (requêtes, p95) du mode régression ;
+- concurrency.py, sync_views.py, urls.py : charge concurrente ASGI sur les
+  points d'accès JSON async et leurs anciennes versions synchrones ;
+- settings.py : réglages SQLite pour lancer les mesures sans MySQL.
+
+    python manage.py run_benchmarks --settings=gallery.benchmarks.settings --check
+    python manage.py benchmark_async --settings=gallery.benchmarks.settings
+"""
@@ -0,0 +1,72 @@
+"""Charge concurrente sur l'application ASGI, comme un worker uvicorn.
+
+`concurrency` clients virtuels, chacun connecté avec son propre compte,
+envoient leurs requêtes les uns à la suite des autres sur la même boucle
+d'événements, via AsyncClient (qui passe par le gestionnaire ASGI de Django).
+On relève le débit global et la latence p50/p95/p99 de chaque requête.
+"""
+import asyncio
+import statistics
+import time
+
+from django.test import AsyncClient
+
+from .runner import percentile
+
+# nom : (méthode, URL async, URL sync, données POST)
+ENDPOINTS = {
+    'toggle_like': ('post', '/image/{slug}/like/', '/sync/image/{slug}/like/', None),
+    'add_comment': ('post', '/image/{slug}/comment/', '/sync/image/{slug}/comment/', {'comment-content': 'Mesure'}),
+    'get_all_tags': ('get', '/get-tags/?search=tag', '/sync/get-tags/?search=tag', None),
+}
+
+
+async def _client(user):
+    client = AsyncClient()
+    await client.aforce_login(user)
+    return client
+
+
+async def run_load(endpoint, variant, dataset, concurrency, requests_per_client):
+    method, async_url, sync_url, data = ENDPOINTS[endpoint]
+    url = (async_url if variant == 'async' else sync_url).format(slug=dataset.busiest_image.slug)
+    users = dataset.users
+    clients = [await _client(users[i % len(users)]) for i in range(concurrency)]
+    latencies = []
+
+    async def worker(client):
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            if method == 'post':
+                response = await client.post(url, data or {})
+            else:
+                response = await client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise AssertionError(f"{variant} {endpoint} : statut {response.status_code}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def compare(dataset, concurrency, requests_per_client, endpoints=None):
+    """{endpoint: {'sync': mesures, 'async': mesures}}"""
+    results = {}
+    for endpoint in endpoints or ENDPOINTS:
+        results[endpoint] = {}
+        for variant in ('sync', 'async'):
+            # un tour d'échauffement (caches, index des tags) non mesuré
+            asyncio.run(run_load(endpoint, variant, dataset, 1, 2))
+            results[endpoint][variant] = asyncio.run(
+                run_load(endpoint, variant, dataset, concurrency, requests_per_client)
+            )
+    return results
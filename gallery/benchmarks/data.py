@@ -0,0 +1,150 @@
+"""Jeu de données synthétique pour les mesures.
+
+Tout passe par bulk_create (les signaux ne sont pas déclenchés) ; les
+compteurs, documents de recherche et statistiques quotidiennes sont ensuite
+recalculés comme le feraient les commandes de maintenance.
+"""
+import io
+import random
+from dataclasses import dataclass, field
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db.models import Count
+from PIL import Image as PilImage
+
+from gallery import cache, rollups
+from gallery.models import (
+    AuthorProfile, Category, Comment, Image, ImageLike, ImageSearchDocument, ImageView, Tag,
+)
+from gallery.search import build_document
+
+SCALES = {
+    'small': {'users': 20, 'categories': 5, 'tags': 8, 'images': 200, 'likes': 1000, 'views': 2000, 'comments': 500},
+    'medium': {'users': 100, 'categories': 10, 'tags': 15, 'images': 2000, 'likes': 10000, 'views': 20000, 'comments': 5000},
+    'large': {'users': 500, 'categories': 20, 'tags': 25, 'images': 20000, 'likes': 100000, 'views': 200000, 'comments': 50000},
+}
+PASSWORD = 'benchmark'
+BATCH_SIZE = 1000
+
+
+@dataclass
+class Dataset:
+    """Objets de référence pour les scénarios"""
+    counts: dict
+    users: list = field(default_factory=list)
+    categories: list = field(default_factory=list)
+    tags: list = field(default_factory=list)
+    busiest_image: Image = None  # la plus commentée : pire cas de image_detail
+    busiest_author: User = None  # le plus d'images : pire cas de profile_view
+
+
+def synthetic_image(width=64, height=48, fmt='JPEG', rng=random):
+    """Petit fichier image d'une couleur unie (quelques centaines d'octets)"""
+    color = tuple(rng.randrange(256) for _ in range(3))
+    buffer = io.BytesIO()
+    PilImage.new('RGB', (width, height), color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _unique_pairs(rng, n, left, right):
+    """n couples (gauche, droite) distincts au plus"""
+    n = min(n, len(left) * len(right))
+    pairs = set()
+    while len(pairs) < n:
+        pairs.add((rng.choice(left), rng.choice(right)))
+    return pairs
+
+
+def generate(users, categories, tags, images, likes, views, comments, seed=0):
+    """Créer le jeu de données ; `tags` est le nombre de tags par catégorie"""
+    rng = random.Random(seed)
+    counts = {'users': users, 'categories': categories, 'tags': tags, 'images': images,
+              'likes': likes, 'views': views, 'comments': comments}
+
+    password = User(username='x')
+    password.set_password(PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f'bench{i}', email=f'bench{i}@example.com', password=password.password)
+         for i in range(users)],
+        batch_size=BATCH_SIZE,
+    )
+    user_list = list(User.objects.filter(username__startswith='bench').order_by('pk'))
+    AuthorProfile.objects.bulk_create([AuthorProfile(user=u) for u in user_list], batch_size=BATCH_SIZE)
+
+    Category.objects.bulk_create(
+        [Category(name=f'Catégorie {i}', slug=f'categorie-{i}') for i in range(categories)]
+    )
+    category_list = list(Category.objects.order_by('pk'))
+    Tag.objects.bulk_create(
+        [Tag(name=f'tag {c.pk}-{i}', slug=f'tag-{c.pk}-{i}', category=c) for c in category_list for i in range(tags)],
+        batch_size=BATCH_SIZE,
+    )
+    tags_by_category = {}
+    for tag in Tag.objects.order_by('pk'):
+        tags_by_category.setdefault(tag.category_id, []).append(tag)
+
+    # quelques fichiers partagés suffisent : les vues ne lisent que les noms
+    storage = Image._meta.get_field('image').storage
+    files = [storage.save(f'gallery/benchmark/{i}.jpg', ContentFile(synthetic_image(rng=rng))) for i in range(10)]
+
+    Image.objects.bulk_create([
+        Image(
+            title=f'Image {i}', slug=f'image-{i}', description=f'Description de l\'image {i}',
+            author=rng.choice(user_list), category=rng.choice(category_list) if category_list else None,
+            image=rng.choice(files), width=64, height=48, file_size=1000,
+            processing_status=Image.STATUS_READY,
+        )
+        for i in range(images)
+    ], batch_size=BATCH_SIZE)
+    image_list = list(Image.objects.order_by('pk').only('pk', 'category_id'))
+
+    through = Image.tags.through
+    links = []
+    for image in image_list:
+        candidates = tags_by_category.get(image.category_id, [])
+        for tag in rng.sample(candidates, min(3, len(candidates))):
+            links.append(through(image_id=image.pk, tag_id=tag.pk))
+    through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+
+    image_ids = [image.pk for image in image_list]
+    user_ids = [u.pk for u in user_list]
+    ImageLike.objects.bulk_create(
+        [ImageLike(image_id=i, user_id=u) for i, u in _unique_pairs(rng, likes, image_ids, user_ids)],
+        batch_size=BATCH_SIZE,
+    )
+    # une vue par (image, utilisateur) et par (image, IP) : moitié connectés, moitié anonymes
+    ips = [f'10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}' for n in range(max(views, 1))]
+    member_views = _unique_pairs(rng, views // 2, image_ids, user_ids)
+    anonymous_views = _unique_pairs(rng, views - len(member_views), image_ids, ips)
+    ImageView.objects.bulk_create(
+        [ImageView(image_id=i, user_id=u) for i, u in member_views]
+        + [ImageView(image_id=i, ip_address=ip) for i, ip in anonymous_views],
+        batch_size=BATCH_SIZE,
+    )
+    Comment.objects.bulk_create(
+        [Comment(image_id=rng.choice(image_ids), author_id=rng.choice(user_ids), content=f'Commentaire {i}')
+         for i in range(comments)],
+        batch_size=BATCH_SIZE,
+    )
+
+    # ce que les signaux et les commandes de maintenance tiennent à jour
+    call_command('recount_counters', stdout=io.StringIO())
+    documents = Image.objects.select_related('author', 'category').prefetch_related('tags')
+    ImageSearchDocument.objects.bulk_create(
+        [ImageSearchDocument(image_id=image.pk, **build_document(image)) for image in documents],
+        batch_size=BATCH_SIZE,
+    )
+    rollups.compact()
+    cache.bump('categories', 'tags', 'images')
+
+    busiest_author = User.objects.annotate(n=Count('images')).order_by('-n', 'pk').first()
+    return Dataset(
+        counts=counts,
+        users=user_list,
+        categories=category_list,
+        tags=[tag for group in tags_by_category.values() for tag in group],
+        busiest_image=Image.objects.order_by('-comments_count', 'pk').first(),
+        busiest_author=busiest_author,
+    )
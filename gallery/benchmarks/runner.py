@@ -0,0 +1,204 @@
+"""Passage des vues au client de test et comparaison aux budgets.
+
+Chaque scénario est exécuté `warmup` fois sans mesure (caches chauds, comme
+en production), puis `repeat` fois pour la latence et le nombre de requêtes
+SQL (le maximum observé est retenu), puis une dernière fois sous tracemalloc
+pour le pic de mémoire Python ; tracemalloc ralentit trop pour mesurer la
+latence en même temps.
+"""
+import io
+import json
+import math
+import platform
+import resource
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+import django
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .data import PASSWORD, synthetic_image
+
+# marge des budgets de latence écrits par --update-budgets : la latence varie
+# d'une machine et d'une exécution à l'autre, le nombre de requêtes non
+LATENCY_HEADROOM = 2.0
+LATENCY_SLACK_MS = 25
+
+
+@dataclass
+class Scenario:
+    name: str
+    run: callable  # (client, dataset, iteration) -> réponse
+    expected_status: tuple = (200,)
+    login: str = None  # 'busiest_author' ou 'user' ; None : visiteur anonyme
+    settings: dict = None  # réglages propres au scénario (override_settings)
+
+
+def _index(client, data, i):
+    return client.get(reverse('index'))
+
+
+def _category(client, data, i):
+    return client.get(reverse('category', args=[data.categories[0].slug]))
+
+
+def _image_detail(client, data, i):
+    return client.get(reverse('image_detail', args=[data.busiest_image.slug]))
+
+
+def _api_images(client, data, i):
+    return client.get(reverse('api_images'))
+
+
+def _profile(client, data, i):
+    return client.get(reverse('profile'))
+
+
+def _toggle_like(client, data, i):
+    # alterne like / unlike sur la même image
+    return client.post(reverse('toggle_like', args=[data.busiest_image.slug]))
+
+
+def _get_all_tags(client, data, i):
+    return client.get(reverse('get_all_tags'), {'search': 'tag'})
+
+
+def _upload(client, data, i):
+    upload = io.BytesIO(synthetic_image(fmt='PNG'))
+    upload.name = f'envoi-{i}.png'
+    return client.post(reverse('upload_image'), {
+        'title': f'Envoi {i}',
+        'description': 'Envoi mesuré',
+        'category': data.categories[0].pk,
+        'image': upload,
+        'tags_ids': ','.join(str(t.pk) for t in data.tags[:3]),
+    })
+
+
+SCENARIOS = [
+    Scenario('index', _index),
+    Scenario('category_view', _category),
+    Scenario('image_detail', _image_detail),
+    # cache de pages anonymes (gallery/pagecache.py), coupé pour les autres scénarios
+    Scenario('index_cached', _index, settings={'GALLERY_PAGE_CACHE': True}),
+    Scenario('image_detail_cached', _image_detail, settings={'GALLERY_PAGE_CACHE': True}),
+    Scenario('profile_view', _profile, login='busiest_author'),
+    Scenario('toggle_like', _toggle_like, login='user'),
+    Scenario('get_all_tags', _get_all_tags),
+    Scenario('api_images', _api_images),
+    Scenario('upload_image', _upload, expected_status=(302,), login='user'),
+]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(len(ordered) * p / 100) - 1)]
+
+
+def _client_for(scenario, data):
+    client = Client()
+    if scenario.login:
+        user = data.busiest_author if scenario.login == 'busiest_author' else data.users[-1]
+        if not client.login(username=user.username, password=PASSWORD):
+            raise RuntimeError(f"Connexion impossible pour {user.username}")
+    return client
+
+
+def measure(scenario, data, repeat, warmup=2):
+    client = _client_for(scenario, data)
+    iteration = 0
+
+    def call():
+        nonlocal iteration
+        iteration += 1
+        response = scenario.run(client, data, iteration)
+        if response.status_code not in scenario.expected_status:
+            raise AssertionError(f"{scenario.name} : statut {response.status_code}")
+        # les réponses en flux doivent être lues pour être mesurées
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    for _ in range(warmup):
+        call()
+
+    timings, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'queries': max(queries),
+        'queries_min': min(queries),
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run(data, repeat, only=None):
+    """Mesurer les scénarios ; retourne le rapport (dict sérialisable en JSON)"""
+    results = {}
+    for scenario in SCENARIOS:
+        if only and scenario.name not in only:
+            continue
+        with override_settings(**(scenario.settings or {})):
+            results[scenario.name] = measure(scenario, data, repeat)
+    return {
+        'meta': {
+            'date': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeat': repeat,
+            'dataset': data.counts,
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'views': results,
+    }
+
+
+def load_budgets(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_budgets(report, scale):
+    """Budgets à versionner : requêtes exactes, latence avec marge"""
+    return {
+        'scale': scale,
+        'database': report['meta']['database'],
+        'views': {
+            name: {'queries': r['queries'], 'p95_ms': round(r['p95_ms'] * LATENCY_HEADROOM + LATENCY_SLACK_MS, 1)}
+            for name, r in report['views'].items()
+        },
+    }
+
+
+def check_budgets(report, budgets):
+    """Liste des dépassements, vide si tout tient dans les budgets"""
+    failures = []
+    for name, budget in budgets['views'].items():
+        result = report['views'].get(name)
+        if result is None:
+            continue
+        if 'queries' in budget and result['queries'] > budget['queries']:
+            failures.append(f"{name} : {result['queries']} requêtes SQL (budget {budget['queries']})")
+        if 'p95_ms' in budget and result['p95_ms'] > budget['p95_ms']:
+            failures.append(f"{name} : p95 {result['p95_ms']} ms (budget {budget['p95_ms']} ms)")
+    return failures
@@ -0,0 +1,20 @@
+"""Réglages des mesures : SQLite (base de test en mémoire), hachage rapide"""
+from mygallery.settings import *  # noqa: F401,F403
+from mygallery.settings import BASE_DIR
+
+import os
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'benchmark.sqlite3'),
+    }
+}
+
+# la création de milliers de comptes ne doit pas mesurer PBKDF2
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+DEBUG = False
+
+# les vues sont mesurées sans le cache de pages, sauf scénarios *_cached
+GALLERY_PAGE_CACHE = False
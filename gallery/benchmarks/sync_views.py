@@ -0,0 +1,46 @@
+"""Versions synchrones des points d'accès JSON async, servies par
+benchmarks/urls.py sous /sync/ pour la comparaison de la commande
+benchmark_async. Elles font les mêmes requêtes avec les mêmes fonctions
+(likes.toggle_like, _comment_data, index des tags) que les vues async : seule la manière
+de les appeler diffère. Ne pas utiliser ailleurs.
+"""
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
+
+from gallery import likes
+from gallery.models import Comment, Image
+from gallery.tagindex import get_limit as get_tag_limit, get_tag_index
+from gallery.views import _comment_data
+
+
+@require_POST
+@login_required
+def toggle_like(request, slug):
+    image = get_object_or_404(Image.objects.only('pk', 'author_id'), slug=slug)
+    liked, likes_count = likes.toggle_like(image, request.user)
+    return JsonResponse({'liked': liked, 'likes_count': likes_count})
+
+
+@require_POST
+@login_required
+def add_comment(request, slug):
+    image = get_object_or_404(Image, slug=slug)
+    content = request.POST.get('comment-content', '').strip()
+    if not content:
+        return JsonResponse({'success': False, 'error': 'Commentaire vide'})
+    comment = Comment.objects.create(image=image, author=request.user, content=content)
+    image.refresh_from_db(fields=['comments_count'])
+    return JsonResponse({
+        'success': True,
+        'comment': _comment_data(comment, request.user),
+        'comments_count': image.get_comments_count(),
+    })
+
+
+def get_all_tags(request):
+    tags = get_tag_index().search(request.GET.get('search', ''), limit=get_tag_limit(request.GET.get('limit')))
+    return JsonResponse({'tags': [
+        {'id': t.id, 'name': t.name, 'category': t.category, 'popularity': t.popularity} for t in tags
+    ]})
@@ -0,0 +1,11 @@
+"""URLconf de benchmark_async : le site, plus les versions synchrones sous /sync/"""
+from django.urls import include, path
+
+from . import sync_views
+
+urlpatterns = [
+    path('sync/image/<slug:slug>/like/', sync_views.toggle_like, name='sync_toggle_like'),
+    path('sync/image/<slug:slug>/comment/', sync_views.add_comment, name='sync_add_comment'),
+    path('sync/get-tags/', sync_views.get_all_tags, name='sync_get_all_tags'),
+    path('', include('mygallery.urls')),
+]
@@ -0,0 +1,104 @@
+"""Cache des données partagées par les pages (catégories, tags, barre de navigation).
+
+Chaque donnée dépend d'un ou plusieurs espaces ('categories', 'tags',
+'images') dont la génération est un entier stocké dans le cache. Les
+récepteurs post_save/post_delete de models.py incrémentent la génération
+concernée ; les clés contiennent les générations, donc les anciennes
+valeurs ne sont plus jamais lues et expirent d'elles-mêmes.
+
+Fonctionne avec tous les backends de Django. Avec locmem, chaque processus
+a ses propres générations : les autres processus ne voient un changement
+qu'après GALLERY_CACHE_TIMEOUT secondes ; le backend fichier (ou
+memcached/redis) partage les générations entre processus.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'gallery'
+DEFAULT_TIMEOUT = 300
+
+
+def _generation_key(namespace):
+    return f'{KEY_PREFIX}:gen:{namespace}'
+
+
+def get_timeout():
+    return getattr(settings, 'GALLERY_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def generation(namespace):
+    key = _generation_key(namespace)
+    value = cache.get(key)
+    if value is None:
+        # valeur inédite : ne jamais retomber sur une clé d'avant une éviction
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump(*namespaces):
+    """Invalider tout ce qui dépend de ces espaces"""
+    for namespace in namespaces:
+        key = _generation_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # clé absente (premier appel ou éviction)
+            cache.set(key, time.time_ns(), None)
+
+
+def versioned_key(name, namespaces):
+    generations = '-'.join(str(generation(ns)) for ns in namespaces)
+    return f'{KEY_PREFIX}:{name}:{generations}'
+
+
+def get_or_build(name, namespaces, build, timeout=None):
+    """Valeur en cache pour les générations courantes, sinon build()"""
+    key = versioned_key(name, namespaces)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, get_timeout() if timeout is None else timeout)
+    return value
+
+
+def get_categories():
+    """Toutes les catégories, triées par nom"""
+    from .models import Category
+    return get_or_build('categories', ('categories',), lambda: list(Category.objects.order_by('name')))
+
+
+def get_category(slug):
+    return next((c for c in get_categories() if c.slug == slug), None)
+
+
+def _build_tag_lists():
+    from django.db.models import Count
+    from .models import Tag
+
+    rows = (
+        Tag.objects.order_by('name')
+        .annotate(popularity=Count('images'))
+        .values_list('id', 'name', 'category_id', 'category__name', 'popularity')
+    )
+    lists = {}
+    for pk, name, category_id, category, popularity in rows:
+        lists.setdefault(category_id, []).append({
+            'id': pk,
+            'name': name,
+            'category': category or '',
+            'popularity': popularity,
+        })
+    return lists
+
+
+def get_tag_lists():
+    """{category_id: [{'id', 'name', 'category', 'popularity'}, ...]} triés par nom"""
+    # la popularité (nombre d'images) dépend aussi des images
+    return get_or_build('tag-lists', ('tags', 'images'), _build_tag_lists)
+
+
+def get_category_tags(category_id):
+    return get_tag_lists().get(category_id, [])
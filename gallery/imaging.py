@@ -0,0 +1,101 @@
+"""Lecture des dimensions et réduction des originaux trop grands.
+
+Les dimensions et l'orientation EXIF sont lues dans l'en-tête du fichier
+(PIL n'y décode aucun pixel). Au-delà de MAX_DIMENSION, la réduction
+évite le décodage en pleine résolution :
+
+- JPEG : draft() demande au décodeur une échelle 1/2, 1/4 ou 1/8
+  directement dans la DCT ;
+- autres formats : reduce() par un facteur entier (moyenne de blocs),
+  plus légère que le rééchantillonnage complet, dans les modes qu'il
+  accepte (pas les images à palette 'P' ni '1', réduites par thumbnail) ;
+
+puis thumbnail() LANCZOS pour la taille exacte, sur une image déjà petite.
+L'EXIF est lu sur l'original : reduce() rend une image sans img.info.
+"""
+import io
+
+from PIL import Image as PilImage, ImageOps
+
+MAX_DIMENSION = 4000
+JPEG_QUALITY = 90
+
+# orientations EXIF qui échangent largeur et hauteur à l'affichage
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+ORIENTATION_TAG = 0x0112
+
+# comme ImageOps.exif_transpose, appliqué après réduction
+ORIENTATION_TRANSPOSE = {
+    2: PilImage.Transpose.FLIP_LEFT_RIGHT,
+    3: PilImage.Transpose.ROTATE_180,
+    4: PilImage.Transpose.FLIP_TOP_BOTTOM,
+    5: PilImage.Transpose.TRANSPOSE,
+    6: PilImage.Transpose.ROTATE_270,
+    7: PilImage.Transpose.TRANSVERSE,
+    8: PilImage.Transpose.ROTATE_90,
+}
+
+# modes acceptés par Image.reduce() ('P' et '1' lèvent ValueError)
+REDUCIBLE_MODES = {'L', 'LA', 'La', 'RGB', 'RGBA', 'RGBa', 'RGBX', 'CMYK', 'YCbCr', 'I', 'F'}
+
+
+def read_header(source):
+    """(largeur, hauteur affichées, format) sans décoder l'image"""
+    with PilImage.open(source) as img:
+        width, height = img.size
+        orientation = img.getexif().get(ORIENTATION_TAG, 1)
+        fmt = img.format
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    return width, height, fmt
+
+
+def needs_downscale(width, height, max_dimension=MAX_DIMENSION):
+    return width > max_dimension or height > max_dimension
+
+
+def downscale(source, max_dimension=MAX_DIMENSION):
+    """Réduire une image pour tenir dans max_dimension ; retourne (octets, largeur, hauteur)"""
+    with PilImage.open(source) as img:
+        fmt = img.format
+        has_exif = 'exif' in img.info
+        exif = img.getexif()
+        orientation = exif.get(ORIENTATION_TAG, 1)
+        target = (max_dimension, max_dimension)
+        if fmt == 'JPEG':
+            # échelle de décodage la plus petite qui reste >= à la taille
+            # finale (proportions conservées, pas le carré max_dimension)
+            ratio = max_dimension / max(img.size)
+            img.draft(img.mode, (int(img.width * ratio), int(img.height * ratio)))
+        elif img.mode in REDUCIBLE_MODES:
+            factor = max(img.size) // max_dimension
+            if factor >= 2:
+                img = img.reduce(factor)
+        img.thumbnail(target, PilImage.Resampling.LANCZOS)
+        if orientation in ORIENTATION_TRANSPOSE:
+            img = img.transpose(ORIENTATION_TRANSPOSE[orientation])
+
+        options = {}
+        if fmt == 'JPEG':
+            options = {'quality': JPEG_QUALITY, 'optimize': True}
+            if img.mode not in ('RGB', 'L', 'CMYK'):
+                img = img.convert('RGB')
+        if has_exif:
+            # orientation appliquée aux pixels, les autres champs restent
+            exif.pop(ORIENTATION_TAG, None)
+            options['exif'] = exif.tobytes()
+        buffer = io.BytesIO()
+        img.save(buffer, format=fmt, **options)
+        return buffer.getvalue(), img.width, img.height
+
+
+def full_decode_downscale(source, max_dimension=MAX_DIMENSION):
+    """Ancienne méthode (décodage complet puis thumbnail), pour les mesures"""
+    with PilImage.open(source) as img:
+        fmt = img.format
+        img.load()
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_dimension, max_dimension), PilImage.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format=fmt)
+        return buffer.getvalue(), img.width, img.height
@@ -0,0 +1,274 @@
+"""Mesure de chaque requête : base de données, gabarits, temps total.
+
+Un execute_wrapper posé une fois pour toutes sur chaque connexion (signal
+connection_created) compte et chronomètre les requêtes SQL de la requête
+HTTP en cours, retrouvée par une ContextVar : elle suit aussi les appels
+ORM des vues async, exécutés dans le thread de sync_to_async avec leur
+propre connexion. Le SQL répété (même texte, paramètres différents : signe
+d'un N+1) est repéré. Le rendu
+des gabarits est chronométré au niveau du gabarit racine (les {% include %}
+sont comptés dans leur parent).
+
+Chaque réponse reçoit un en-tête Server-Timing (db, tpl, app), et les
+durées alimentent un histogramme glissant par nom d'URL, en mémoire dans
+chaque processus, lu par la vue réservée au staff `instrumentation_stats`.
+
+Le coût est celui d'un perf_counter() et d'une entrée de dict par requête
+SQL, et d'un verrou par requête HTTP : on peut le laisser actif en charge.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+# bornes supérieures des cases de l'histogramme, en ms
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+DEFAULT_WINDOW = 15  # minutes conservées
+DEFAULT_DUPLICATE_THRESHOLD = 5  # même SQL exécuté n fois dans une requête
+
+_current = ContextVar('gallery_request_stats', default=None)
+
+
+def is_enabled():
+    return getattr(settings, 'GALLERY_INSTRUMENTATION', True)
+
+
+def get_window():
+    return getattr(settings, 'GALLERY_INSTRUMENTATION_WINDOW', DEFAULT_WINDOW)
+
+
+def get_duplicate_threshold():
+    return getattr(settings, 'GALLERY_DUPLICATE_SQL_THRESHOLD', DEFAULT_DUPLICATE_THRESHOLD)
+
+
+class RequestStats:
+    """Mesures d'une requête HTTP"""
+    __slots__ = ('queries', 'db_time', 'template_time', 'template_depth', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.statements = Counter()
+
+    def duplicates(self, threshold):
+        """{sql: nombre d'exécutions} pour le SQL répété au moins `threshold` fois"""
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - start
+        stats.queries += 1
+        stats.statements[sql] += 1
+
+
+def _add_wrapper(connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+_original_render = Template.render
+_installed = False
+
+
+def _timed_render(self, context):
+    stats = _current.get()
+    if stats is None or stats.template_depth:
+        return _original_render(self, context)
+    stats.template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        stats.template_time += time.perf_counter() - start
+        stats.template_depth -= 1
+
+
+def install():
+    """Brancher le wrapper SQL sur les connexions (présentes et futures) et
+    chronométrer Template.render (Django n'émet pas de signal de rendu hors tests)"""
+    global _installed
+    if not _installed:
+        connection_created.connect(_add_wrapper, dispatch_uid='gallery_instrumentation')
+        for connection in connections.all(initialized_only=True):
+            _add_wrapper(connection)
+        Template.render = _timed_render
+        _installed = True
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'db_total', 'queries_total', 'template_total', 'duplicate_requests')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = self.db_total = self.template_total = 0.0
+        self.queries_total = self.duplicate_requests = 0
+
+    def add(self, duration, stats, has_duplicates):
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.counts[i] += 1
+                break
+        self.total += duration
+        self.db_total += stats.db_time * 1000
+        self.template_total += stats.template_time * 1000
+        self.queries_total += stats.queries
+        self.duplicate_requests += has_duplicates
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.db_total += other.db_total
+        self.template_total += other.template_total
+        self.queries_total += other.queries_total
+        self.duplicate_requests += other.duplicate_requests
+
+    def percentile(self, p):
+        """Borne supérieure de la case qui contient le p-ième centile"""
+        n = sum(self.counts)
+        if not n:
+            return None
+        rank = n * p / 100
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float('inf') else None
+        return None
+
+    def as_dict(self):
+        n = sum(self.counts)
+        return {
+            'requests': n,
+            'mean_ms': round(self.total / n, 2),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'db_mean_ms': round(self.db_total / n, 2),
+            'queries_mean': round(self.queries_total / n, 2),
+            'template_mean_ms': round(self.template_total / n, 2),
+            'duplicate_sql_requests': self.duplicate_requests,
+            'buckets': {('+inf' if b == float('inf') else str(b)): c for b, c in zip(BUCKETS, self.counts)},
+        }
+
+
+class TimingRegistry:
+    """Histogrammes par nom d'URL et par minute, sur les `window` dernières minutes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._minutes = defaultdict(dict)  # minute -> {nom: Histogram}
+
+    def record(self, name, duration, stats, has_duplicates, now=None):
+        minute = int((now or time.time()) // 60)
+        with self._lock:
+            per_name = self._minutes[minute]
+            if name not in per_name:
+                per_name[name] = Histogram()
+            per_name[name].add(duration, stats, has_duplicates)
+            if len(self._minutes) > get_window():
+                oldest = minute - get_window()
+                for old in [m for m in self._minutes if m <= oldest]:
+                    del self._minutes[old]
+
+    def snapshot(self, now=None):
+        first = int((now or time.time()) // 60) - get_window() + 1
+        merged = defaultdict(Histogram)
+        with self._lock:
+            for minute, per_name in self._minutes.items():
+                if minute >= first:
+                    for name, histogram in per_name.items():
+                        merged[name].merge(histogram)
+        return {name: histogram.as_dict() for name, histogram in sorted(merged.items())}
+
+    def reset(self):
+        with self._lock:
+            self._minutes.clear()
+
+
+registry = TimingRegistry()
+
+
+def snapshot():
+    return {'pid': os.getpid(), 'window_minutes': get_window(), 'views': registry.snapshot()}
+
+
+class InstrumentationMiddleware:
+    """À placer en tête de MIDDLEWARE pour compter aussi session et authentification.
+
+    Synchrone et asynchrone : sous ASGI, les vues async ne repassent pas par
+    un thread à cause de ce middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not is_enabled():
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        if not is_enabled():
+            return await self.get_response(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, start)
+
+    def finish(self, request, response, stats, start):
+        duration = (time.perf_counter() - start) * 1000
+
+        match = request.resolver_match
+        name = match.view_name if match else 'unresolved'
+        duplicates = stats.duplicates(get_duplicate_threshold())
+        if duplicates:
+            sql, count = max(duplicates.items(), key=lambda item: item[1])
+            logger.warning("SQL répété %d fois dans %s (N+1 ?) : %s", count, name, sql[:300])
+        registry.record(name, duration, stats, bool(duplicates))
+
+        response['Server-Timing'] = (
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} SQL", '
+            f'tpl;dur={stats.template_time * 1000:.1f}, '
+            f'app;dur={duration:.1f}'
+        )
+        return response
@@ -0,0 +1,171 @@
+"""File de tâches en base pour les traitements lourds hors requête.
+
+Image.save() lit les dimensions dans l'en-tête, écrit le fichier (déjà
+réduit s'il dépasse 4000px) et enregistre une tâche ; le worker
+`python manage.py process_jobs` génère ensuite les déclinaisons, avec reprises.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import imaging, similarity
+from .renditions import generate_renditions, share_renditions
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = 30  # secondes, doublé à chaque tentative
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue(image, kind='process_image', **kwargs):
+    """Enregistrer une tâche pour une image (dans la transaction courante)"""
+    from .models import ProcessingJob
+    return ProcessingJob.objects.create(image=image, kind=kind, **kwargs)
+
+
+def enqueue_once(image, kind):
+    """Comme enqueue(), sauf si une tâche identique attend déjà"""
+    from .models import ProcessingJob
+    pending = ProcessingJob.objects.filter(image=image, kind=kind, status=ProcessingJob.STATUS_PENDING)
+    if not pending.exists():
+        return enqueue(image, kind=kind)
+
+
+def process_image(image):
+    """Métadonnées, réduction au-delà de 4000px et déclinaisons"""
+    from .models import Image
+
+    # doublon exact d'une image déjà traitée : même fichier, mêmes déclinaisons
+    source = (
+        Image.objects.filter(image=image.image.name, processing_status=Image.STATUS_READY)
+        .exclude(pk=image.pk).first()
+    )
+    if source is not None:
+        share_renditions(image, source)
+        Image.objects.filter(pk=image.pk).update(
+            width=source.width,
+            height=source.height,
+            file_size=source.file_size,
+            processing_status=Image.STATUS_READY,
+        )
+        return
+
+    # dimensions normalement lues à l'envoi (Image.read_dimensions) ; les
+    # anciennes images et les imports sont relus et réduits ici
+    if image.width is None or image.height is None:
+        with image.image.open('rb') as f:
+            image.width, image.height, _ = imaging.read_header(f)
+    if imaging.needs_downscale(image.width, image.height):
+        with image.image.open('rb') as f:
+            data, image.width, image.height = imaging.downscale(f)
+        with open(image.image.path, 'wb') as f:
+            f.write(data)
+        image.file_size = len(data)
+    if image.file_size is None:
+        image.file_size = image.image.size
+
+    generate_renditions(image)
+
+    Image.objects.filter(pk=image.pk).update(
+        width=image.width,
+        height=image.height,
+        file_size=image.file_size,
+        processing_status=Image.STATUS_READY,
+    )
+
+
+def update_similar(image):
+    similarity.update_image(image)
+
+
+HANDLERS = {
+    'process_image': process_image,
+    'update_similar': update_similar,
+}
+
+# tâches qui pilotent Image.processing_status
+STATUS_KINDS = {'process_image'}
+
+
+def requeue_stale_jobs():
+    """Remettre en attente les tâches bloquées (worker tué en cours de route)"""
+    from .models import Image, ProcessingJob
+    stale = ProcessingJob.objects.filter(
+        status=ProcessingJob.STATUS_RUNNING,
+        locked_at__lt=timezone.now() - STALE_AFTER,
+    )
+    image_ids = list(stale.filter(kind__in=STATUS_KINDS).values_list('image_id', flat=True))
+    requeued = stale.update(status=ProcessingJob.STATUS_PENDING, locked_at=None)
+    if image_ids:
+        Image.objects.filter(
+            pk__in=image_ids, processing_status=Image.STATUS_PROCESSING,
+        ).update(processing_status=Image.STATUS_PENDING)
+    return requeued
+
+
+def claim_next_job():
+    """Réserver la prochaine tâche due.
+
+    La réservation est une mise à jour conditionnelle (status=pending) : si
+    deux workers visent la même ligne, un seul obtient rowcount == 1.
+    """
+    from .models import ProcessingJob
+
+    now = timezone.now()
+    candidates = (
+        ProcessingJob.objects.filter(status=ProcessingJob.STATUS_PENDING, run_after__lte=now)
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = ProcessingJob.objects.filter(
+            id=job_id, status=ProcessingJob.STATUS_PENDING
+        ).update(
+            status=ProcessingJob.STATUS_RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return ProcessingJob.objects.select_related('image__author').get(id=job_id)
+    return None
+
+
+def run_job(job):
+    """Exécuter une tâche réservée et enregistrer son résultat"""
+    from .models import Image, ProcessingJob
+
+    handler = HANDLERS.get(job.kind)
+    tracks_status = job.kind in STATUS_KINDS
+    if tracks_status:
+        Image.objects.filter(pk=job.image_id).update(processing_status=Image.STATUS_PROCESSING)
+    try:
+        if handler is None:
+            raise ValueError(f"Type de tâche inconnu : {job.kind}")
+        with transaction.atomic():
+            handler(job.image)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = ProcessingJob.STATUS_FAILED
+            if tracks_status:
+                Image.objects.filter(pk=job.image_id).update(processing_status=Image.STATUS_FAILED)
+            logger.error("Tâche %s (%s) en échec définitif", job.pk, job.kind)
+        else:
+            job.status = ProcessingJob.STATUS_PENDING
+            if tracks_status:
+                Image.objects.filter(pk=job.image_id).update(processing_status=Image.STATUS_PENDING)
+            job.run_after = timezone.now() + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (job.attempts - 1))
+            logger.warning("Tâche %s (%s) en échec, nouvel essai à %s", job.pk, job.kind, job.run_after)
+        job.locked_at = None
+        job.save(update_fields=['status', 'run_after', 'last_error', 'locked_at', 'updated_at'])
+        return False
+
+    job.status = ProcessingJob.STATUS_DONE
+    job.locked_at = None
+    job.last_error = ''
+    job.save(update_fields=['status', 'locked_at', 'last_error', 'updated_at'])
+    return True
@@ -0,0 +1,46 @@
+"""Likes : bascule atomique et état groupé pour les pages de liste.
+
+toggle_like() fait tout dans une transaction : la ligne du like est lue
+avec un verrou (select_for_update), puis supprimée si elle existe, créée
+sinon. Deux onglets qui basculent en même temps sont ainsi sérialisés, et
+si deux créations se croisent quand même (aucune ligne à verrouiller), la
+contrainte unique (image, user) fait échouer la seconde, qui renvoie l'état
+« aimé » déjà écrit par la première. Le compteur likes_count est tenu par
+les signaux (F() + 1 / - 1) et relu par clé primaire, sans COUNT.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+MAX_BATCH = 100  # slugs par appel de like_states()
+
+
+def toggle_like(image, user):
+    """Aimer ou ne plus aimer ; retourne (aimé, likes_count)"""
+    from .models import Image, ImageLike
+
+    try:
+        with transaction.atomic():
+            like = ImageLike.objects.select_for_update().filter(image=image, user=user).first()
+            if like is not None:
+                like.image = image  # auteur connu : pas de requête dans les signaux
+                like.delete()
+            else:
+                ImageLike.objects.create(image=image, user=user)
+            likes_count = Image.objects.filter(pk=image.pk).values_list('likes_count', flat=True).get()
+        return like is None, likes_count
+    except IntegrityError:
+        # créé entre-temps par une autre requête : déjà aimé, rien à changer
+        return True, Image.objects.filter(pk=image.pk).values_list('likes_count', flat=True).get()
+
+
+def like_states(slugs, user):
+    """{slug: {'liked', 'likes_count'}} pour les images demandées, en une requête"""
+    from .models import Image, ImageLike
+
+    images = Image.objects.filter(slug__in=list(slugs)[:MAX_BATCH])
+    if user.is_authenticated:
+        images = images.annotate(liked=Exists(ImageLike.objects.filter(image=OuterRef('pk'), user=user)))
+        rows = images.values_list('slug', 'likes_count', 'liked')
+    else:
+        rows = ((slug, count, False) for slug, count in images.values_list('slug', 'likes_count'))
+    return {slug: {'liked': liked, 'likes_count': count} for slug, count, liked in rows}
@@ -0,0 +1,63 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from gallery.models import Image
+from gallery.renditions import build_renditions, store_renditions
+
+
+def _render(job):
+    """Exécuté dans un processus du pool : encodage seulement, pas de base"""
+    pk, path = job
+    try:
+        return pk, build_renditions(path), None
+    except Exception as exc:
+        return pk, None, str(exc)
+
+
+class Command(BaseCommand):
+    help = "Génère les déclinaisons (320/640/1280, JPEG+WebP) des images existantes, en parallèle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Nombre de processus (défaut : nombre de cœurs)")
+        parser.add_argument('--user', help="Limiter aux images d'un auteur (nom d'utilisateur)")
+        parser.add_argument('--force', action='store_true',
+                            help="Régénérer aussi les images qui ont déjà des déclinaisons")
+
+    def handle(self, *args, **options):
+        images = Image.objects.order_by('pk')
+        if options['user']:
+            images = images.filter(author__username=options['user'])
+        if not options['force']:
+            images = images.filter(renditions__isnull=True)
+
+        jobs = []
+        for pk, name in images.values_list('pk', 'image').distinct():
+            path = Image._meta.get_field('image').storage.path(name)
+            if os.path.exists(path):
+                jobs.append((pk, path))
+            else:
+                self.stderr.write(f"#{pk} : fichier introuvable ({name})")
+
+        workers = max(1, options['workers'])
+        self.stdout.write(f"{len(jobs)} image(s) à traiter avec {workers} processus...")
+
+        # ne pas partager les connexions ouvertes avec les processus fils
+        connections.close_all()
+
+        done = failed = 0
+        batch = workers * 4  # limite les résultats (octets encodés) en mémoire
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for start in range(0, len(jobs), batch):
+                for pk, renditions, error in pool.map(_render, jobs[start:start + batch]):
+                    if error:
+                        failed += 1
+                        self.stderr.write(f"#{pk} : {error}")
+                        continue
+                    store_renditions(Image.objects.get(pk=pk), renditions)
+                    done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{done} image(s) traitée(s), {failed} échec(s)."))
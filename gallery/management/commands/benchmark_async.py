@@ -0,0 +1,53 @@
+import json
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings, setup_databases, setup_test_environment, \
+    teardown_databases, teardown_test_environment
+
+from gallery.benchmarks import concurrency, data as bench_data
+from gallery.viewtracking import view_buffer
+
+
+class Command(BaseCommand):
+    help = ("Compare sous charge concurrente (ASGI) les points d'accès JSON async "
+            "à leurs anciennes versions synchrones : débit et latence de queue")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(bench_data.SCALES), default='small')
+        parser.add_argument('--concurrency', type=int, default=20, help="Clients virtuels simultanés")
+        parser.add_argument('--requests', type=int, default=25, help="Requêtes par client")
+        parser.add_argument('--only', nargs='+', choices=sorted(concurrency.ENDPOINTS))
+        parser.add_argument('--report', help="Fichier JSON du rapport")
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp(prefix='gallery-bench-')
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(MEDIA_ROOT=media_root, ROOT_URLCONF='gallery.benchmarks.urls'):
+                cache.clear()
+                dataset = bench_data.generate(**bench_data.SCALES[options['scale']])
+                results = concurrency.compare(
+                    dataset, options['concurrency'], options['requests'], endpoints=options['only'],
+                )
+                view_buffer.flush()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        self.stdout.write(f"{options['concurrency']} clients x {options['requests']} requêtes\n")
+        for endpoint, variants in results.items():
+            for variant, r in variants.items():
+                self.stdout.write(
+                    f"{endpoint:<13} {variant:<5} {r['throughput_rps']:8.1f} req/s   "
+                    f"p50 {r['p50_ms']:8.2f} ms   p95 {r['p95_ms']:8.2f} ms   p99 {r['p99_ms']:8.2f} ms"
+                )
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                json.dump({'concurrency': options['concurrency'], 'requests': options['requests'],
+                           'results': results}, f, indent=2)
+                f.write('\n')
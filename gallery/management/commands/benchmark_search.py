@@ -0,0 +1,61 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from gallery.models import Image
+from gallery.search import get_backend, tokenize
+
+
+class Command(BaseCommand):
+    help = "Compare la recherche plein texte à l'ancien filtre title__icontains"
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*',
+                            help="Requêtes à tester (par défaut : mots tirés des titres)")
+        parser.add_argument('--samples', type=int, default=20,
+                            help="Nombre de requêtes tirées au hasard si aucune n'est donnée")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--limit', type=int, default=30, help="Taille de page simulée")
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or self._sample_queries(options['samples'])
+        if not queries:
+            self.stderr.write("Aucune image : rien à mesurer.")
+            return
+
+        backend = get_backend()
+        limit = options['limit']
+
+        def icontains(q):
+            return list(Image.objects.filter(title__icontains=q).values_list('pk', flat=True)[:limit])
+
+        def fulltext(q):
+            return [pk for pk, _ in backend.search(q)][:limit]
+
+        self.stdout.write(f"{len(queries)} requête(s) x {options['repeat']} répétition(s), "
+                          f"{Image.objects.count()} image(s), moteur {backend.__class__.__name__}\n")
+
+        for label, func in (('icontains', icontains), ('plein texte', fulltext)):
+            timings = []
+            hits = 0
+            for _ in range(options['repeat']):
+                for q in queries:
+                    start = time.perf_counter()
+                    hits += bool(func(q))
+                    timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{label:<12} moyenne {statistics.mean(timings):7.2f} ms   "
+                f"p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms   "
+                f"requêtes avec résultats {hits // options['repeat']}/{len(queries)}"
+            )
+
+    def _sample_queries(self, n):
+        words = set()
+        for title in Image.objects.values_list('title', flat=True)[:5000]:
+            words.update(w.lower() for w in tokenize(title) if len(w) > 2)
+        words = sorted(words)
+        return random.sample(words, min(n, len(words)))
@@ -0,0 +1,75 @@
+import io
+import multiprocessing
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from PIL import Image as PilImage
+
+from gallery import imaging
+
+
+def _run(method, payloads, repeat):
+    """Exécuté dans un processus neuf : temps par envoi et pic de RSS (Ko)"""
+    func = imaging.downscale if method == 'draft' else imaging.full_decode_downscale
+    timings = []
+    for _ in range(repeat):
+        for data in payloads:
+            upload = io.BytesIO(data)
+            start = time.perf_counter()
+            width, height, _ = imaging.read_header(upload)
+            if imaging.needs_downscale(width, height):
+                upload.seek(0)
+                func(upload)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def synthetic_jpeg(width, height):
+    img = PilImage.linear_gradient('L').resize((width, height)).convert('RGB')
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = ("Compare la réduction des envois trop grands : décodage complet "
+            "puis thumbnail, ou draft()/reduce() (temps par envoi, pic de RSS)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*',
+                            help="Images à tester (par défaut : un JPEG synthétique)")
+        parser.add_argument('--size', default='9000x6000',
+                            help="Dimensions du JPEG synthétique, LARGEURxHAUTEUR")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # un processus neuf par étape : sous Linux, un fils part du RSS de son
+        # parent, qui ne doit donc jamais avoir décodé d'image lui-même
+        context = multiprocessing.get_context('spawn')
+
+        if options['files']:
+            payloads = []
+            for path in options['files']:
+                with open(path, 'rb') as f:
+                    payloads.append(f.read())
+        else:
+            width, height = (int(v) for v in options['size'].lower().split('x'))
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                payloads = [pool.submit(synthetic_jpeg, width, height).result()]
+
+        self.stdout.write(f"{len(payloads)} fichier(s) x {options['repeat']} répétition(s), "
+                          f"limite {imaging.MAX_DIMENSION}px\n")
+
+        for label, method in (('décodage complet', 'full'), ('draft/reduce', 'draft')):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                timings, peak_kb = pool.submit(_run, method, payloads, options['repeat']).result()
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{label:<17} moyenne {statistics.mean(timings):8.1f} ms   "
+                f"p50 {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms   "
+                f"pic RSS {peak_kb / 1024:6.1f} MB"
+            )
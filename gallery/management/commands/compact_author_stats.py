@@ -0,0 +1,24 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from gallery.rollups import compact, day_of
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques quotidiennes des auteurs depuis les événements (à lancer chaque nuit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2,
+                            help="Nombre de jours récents à recalculer (défaut : hier et aujourd'hui)")
+        parser.add_argument('--all', action='store_true',
+                            help="Reconstruire tout l'historique")
+
+    def handle(self, *args, **options):
+        start = None if options['all'] else day_of() - timedelta(days=max(1, options['days']) - 1)
+        began = time.perf_counter()
+        count = compact(start=start)
+        elapsed = time.perf_counter() - began
+        scope = "tout l'historique" if start is None else f"depuis le {start}"
+        self.stdout.write(self.style.SUCCESS(f"{count} ligne(s) écrite(s) ({scope}) en {elapsed:.1f} s."))
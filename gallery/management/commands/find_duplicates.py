@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gallery.models import Image
+from gallery.phash import (
+    content_hash, dhash, exact_duplicate_groups, near_duplicate_pairs, to_signed,
+)
+from gallery.renditions import share_renditions
+
+
+class Command(BaseCommand):
+    help = "Liste les doublons exacts (SHA-256) et visuels (dHash) ; peut fusionner les copies exactes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--distance', type=int, default=None,
+                            help="Distance de Hamming maximale entre dHash (défaut : GALLERY_DUPLICATE_DISTANCE)")
+        parser.add_argument('--merge', action='store_true',
+                            help="Faire pointer les doublons exacts vers un seul fichier et supprimer les copies")
+
+    def handle(self, *args, **options):
+        self.fingerprint_missing()
+
+        groups = exact_duplicate_groups()
+        self.stdout.write(f"{len(groups)} groupe(s) de doublons exacts :")
+        for group in groups:
+            self.stdout.write("  " + ", ".join(f"#{i.pk} {i.image.name}" for i in group))
+
+        pairs = near_duplicate_pairs(options['distance'])
+        self.stdout.write(f"{len(pairs)} paire(s) d'images proches :")
+        for d, a, b in pairs:
+            self.stdout.write(f"  d={d} #{a.pk} « {a.title} » ~ #{b.pk} « {b.title} »")
+
+        if options['merge']:
+            freed = sum(self.merge(group) for group in groups)
+            self.stdout.write(self.style.SUCCESS(f"{freed / 1024:.0f} Ko libérés."))
+
+    def fingerprint_missing(self):
+        """Empreintes des images publiées avant leur calcul à l'envoi"""
+        storage = Image._meta.get_field('image').storage
+        count = 0
+        for pk, name in Image.objects.filter(content_hash='').values_list('pk', 'image'):
+            if not name or not storage.exists(name):
+                self.stderr.write(f"#{pk} : fichier introuvable ({name})")
+                continue
+            with storage.open(name, 'rb') as f:
+                sha = content_hash(f)
+                try:
+                    h = to_signed(dhash(f))
+                except (OSError, ValueError):
+                    h = None
+            Image.objects.filter(pk=pk).update(content_hash=sha, phash=h)
+            count += 1
+        if count:
+            self.stdout.write(f"Empreintes calculées pour {count} image(s).")
+
+    def merge(self, group):
+        """Garder le fichier de la plus ancienne image ; retourne les octets libérés"""
+        canonical, duplicates = group[0], group[1:]
+        storage = canonical.image.storage
+        freed = 0
+        for image in duplicates:
+            old_name = image.image.name
+            if old_name == canonical.image.name:
+                continue
+            with transaction.atomic():
+                Image.objects.filter(pk=image.pk).update(image=canonical.image.name)
+                image.image.name = canonical.image.name
+                if canonical.renditions.exists():
+                    share_renditions(image, canonical)
+            if not Image.objects.filter(image=old_name).exists() and storage.exists(old_name):
+                freed += storage.size(old_name)
+                storage.delete(old_name)
+            self.stdout.write(f"  #{image.pk} -> {canonical.image.name}")
+        return freed
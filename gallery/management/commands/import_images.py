@@ -0,0 +1,322 @@
+import csv
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from gallery import cache, rollups
+from gallery.imaging import read_header
+from gallery.models import Category, Image, ImageSearchDocument, ProcessingJob, Tag
+from gallery.phash import content_hash, dhash, to_signed
+from gallery.search import build_document
+from gallery.slugs import MAX_ATTEMPTS, SlugAllocator
+from gallery.uploads import get_max_size
+
+EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+
+def _inspect(path):
+    """Exécuté dans un processus du pool : métadonnées et empreintes, pas de base"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            sha = content_hash(File(f))
+            width, height, _ = read_header(f)
+            f.seek(0)
+            h = to_signed(dhash(f))
+        return path, {'size': size, 'width': width, 'height': height, 'sha': sha, 'phash': h}, None
+    except Exception as exc:
+        return path, None, str(exc)
+
+
+def _split_tags(value):
+    if isinstance(value, list):
+        return [str(t).strip() for t in value if str(t).strip()]
+    return [t.strip() for t in (value or '').split(';') if t.strip()]
+
+
+def read_sidecar(path):
+    """{chemin relatif "<utilisateur>/<fichier>": {title, description, category, tags}}
+
+    CSV : colonnes path,title,description,category,tags (tags séparés par « ; »).
+    JSON : liste d'objets avec "path", ou objet {chemin: {...}}.
+    """
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        rows = data.items() if isinstance(data, dict) else ((row['path'], row) for row in data)
+    else:
+        with open(path, encoding='utf-8', newline='') as f:
+            rows = [(row['path'], row) for row in csv.DictReader(f)]
+
+    metadata = {}
+    for rel_path, row in rows:
+        metadata[rel_path.replace('\\', '/').strip('/')] = {
+            'title': (row.get('title') or '').strip(),
+            'description': (row.get('description') or '').strip(),
+            'category': (row.get('category') or '').strip(),
+            'tags': _split_tags(row.get('tags')),
+        }
+    return metadata
+
+
+class Command(BaseCommand):
+    help = ("Importe en masse une arborescence <racine>/<utilisateur>/<fichier> "
+            "(métadonnées en parallèle, bulk_create par lots, reprise sur checkpoint)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('root', help="Dossier racine, un sous-dossier par nom d'utilisateur")
+        parser.add_argument('--sidecar', help="Fichier CSV ou JSON de titres, catégories et tags")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Nombre de processus d'extraction (défaut : nombre de cœurs)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--checkpoint',
+                            help="Fichier des chemins déjà importés (défaut : <racine>/.import_checkpoint, "
+                                 "ou à côté de MEDIA_ROOT si la racine est dedans)")
+        parser.add_argument('--create-users', action='store_true',
+                            help="Créer les auteurs absents (compte sans mot de passe utilisable)")
+        parser.add_argument('--no-jobs', action='store_true',
+                            help="Ne pas mettre en file le traitement (déclinaisons) des images importées")
+
+    def handle(self, *args, **options):
+        root = os.path.abspath(options['root'])
+        if not os.path.isdir(root):
+            raise CommandError(f"Dossier introuvable : {root}")
+        self.root = root
+        self.media_root = os.path.abspath(settings.MEDIA_ROOT)
+        self.storage = Image._meta.get_field('image').storage
+        self.options = options
+
+        checkpoint_path = options['checkpoint'] or self.default_checkpoint()
+        done = set()
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding='utf-8') as f:
+                done = {line.rstrip('\n') for line in f if line.strip()}
+
+        self.metadata = read_sidecar(options['sidecar']) if options['sidecar'] else {}
+        self.authors = self.load_authors()
+        self.slugs = SlugAllocator(Image, fallback='image')
+        self.categories = {c.name.lower(): c for c in Category.objects.all()}
+        self.tags = {}
+
+        files = [f for f in self.scan() if os.path.relpath(f, root).replace(os.sep, '/') not in done]
+        workers = max(1, options['workers'])
+        batch_size = max(1, options['batch_size'])
+        self.stdout.write(f"{len(files)} fichier(s) à importer avec {workers} processus "
+                          f"({len(done)} déjà importé(s) d'après le checkpoint).")
+
+        # ne pas partager les connexions ouvertes avec les processus fils
+        connections.close_all()
+
+        imported = skipped = failed = 0
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool, \
+                open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+            for start in range(0, len(files), batch_size):
+                batch = files[start:start + batch_size]
+                results = list(pool.map(_inspect, batch, chunksize=max(1, len(batch) // (workers * 4))))
+                n_imported, handled = self.import_batch(results)
+                imported += n_imported
+                skipped += len(handled) - n_imported
+                failed += len(results) - len(handled)
+
+                # checkpoint écrit seulement après la transaction du lot ; les
+                # fichiers illisibles n'y sont pas, pour être repris au prochain passage
+                checkpoint.writelines(os.path.relpath(p, root).replace(os.sep, '/') + '\n' for p in handled)
+                checkpoint.flush()
+
+                elapsed = time.perf_counter() - started
+                processed = start + len(batch)
+                self.stdout.write(f"{processed}/{len(files)} fichier(s), {processed / elapsed:.1f} fichiers/s")
+
+        elapsed = time.perf_counter() - started
+        rate = (imported + skipped + failed) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{imported} image(s) importée(s), {skipped} ignorée(s) en {elapsed:.1f} s ({rate:.1f} fichiers/s)."
+        ))
+        if failed:
+            self.stderr.write(f"{failed} fichier(s) en échec, réessayé(s) au prochain passage.")
+        if imported:
+            self.stdout.write("Pensez à lancer rebuild_similar_images pour les images similaires.")
+
+    def default_checkpoint(self):
+        """<racine>/.import_checkpoint, sauf sous MEDIA_ROOT : media.serve le publierait"""
+        if os.path.commonpath([self.root, self.media_root]) != self.media_root:
+            return os.path.join(self.root, '.import_checkpoint')
+        directory = os.path.join(os.path.dirname(self.media_root), '.import_checkpoints')
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha1(self.root.encode()).hexdigest()[:12]
+        return os.path.join(directory, f'{os.path.basename(self.root) or "media"}-{digest}')
+
+    def scan(self):
+        for username in sorted(os.listdir(self.root)):
+            user_dir = os.path.join(self.root, username)
+            if not os.path.isdir(user_dir) or username not in self.authors:
+                continue
+            for dirpath, dirnames, filenames in os.walk(user_dir):
+                dirnames[:] = sorted(d for d in dirnames if d != 'renditions')
+                for name in sorted(filenames):
+                    if os.path.splitext(name)[1].lower() in EXTENSIONS:
+                        yield os.path.join(dirpath, name)
+
+    def load_authors(self):
+        names = [d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d))]
+        authors = {u.username: u for u in User.objects.filter(username__in=names)}
+        for name in names:
+            if name in authors:
+                continue
+            if self.options['create_users']:
+                user = User(username=name)
+                user.set_unusable_password()
+                user.save()
+                authors[name] = user
+            else:
+                self.stderr.write(f"Utilisateur inconnu, dossier ignoré : {name} (voir --create-users)")
+        return authors
+
+    def get_category(self, name):
+        if not name:
+            return None
+        key = name.lower()
+        if key not in self.categories:
+            self.categories[key], _ = Category.objects.get_or_create(name=name)
+        return self.categories[key]
+
+    def get_tags(self, names, category):
+        if category is None:
+            return []
+        tags = []
+        for name in names:
+            key = (category.pk, name.lower())
+            if key not in self.tags:
+                self.tags[key], _ = Tag.objects.get_or_create(name=name, category=category)
+            tags.append(self.tags[key])
+        return tags
+
+    def stored_name(self, path, username, sha, known):
+        """Nom dans le stockage : fichier existant de même contenu, fichier déjà
+        sous MEDIA_ROOT, ou copie dans gallery/<utilisateur>/"""
+        if sha in known:
+            return known[sha]
+        if os.path.commonpath([path, self.media_root]) == self.media_root:
+            return os.path.relpath(path, self.media_root).replace(os.sep, '/')
+        with open(path, 'rb') as f:
+            return self.storage.save(f"gallery/{username}/{os.path.basename(path)}", File(f))
+
+    def import_batch(self, results):
+        """Insérer un lot ; retourne (importées, chemins traités).
+
+        Les chemins traités sont ceux importés ou volontairement ignorés (trop
+        lourds, déjà présents) ; les fichiers en erreur de lecture n'en font pas partie.
+        """
+        max_size = get_max_size()
+        ok, handled = [], []
+        for path, info, error in results:
+            if error:
+                self.stderr.write(f"{path} : {error}")
+                continue
+            handled.append(path)
+            if info['size'] > max_size:
+                self.stderr.write(f"{path} : fichier trop lourd ({info['size']} octets)")
+            else:
+                ok.append((path, info))
+
+        # doublons exacts : réutiliser le fichier déjà stocké
+        known = dict(
+            Image.objects.filter(content_hash__in={info['sha'] for _, info in ok})
+            .exclude(image='').values_list('content_hash', 'image')
+        )
+        already = set(Image.objects.filter(
+            image__in=[os.path.relpath(p, self.media_root).replace(os.sep, '/') for p, _ in ok]
+        ).values_list('image', flat=True))
+
+        images, image_tags = [], []
+        for path, info in ok:
+            rel_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+            username = rel_path.split('/', 1)[0]
+            meta = self.metadata.get(rel_path, {})
+            name = self.stored_name(path, username, info['sha'], known)
+            if name in already:
+                continue
+            known.setdefault(info['sha'], name)
+
+            title = meta.get('title') or os.path.splitext(os.path.basename(path))[0].replace('-', ' ').replace('_', ' ')
+            category = self.get_category(meta.get('category'))
+            slug = self.slugs.allocate(title)
+            images.append(Image(
+                title=title[:100],
+                slug=slug,
+                description=meta.get('description', ''),
+                author=self.authors[username],
+                category=category,
+                image=name,
+                width=info['width'],
+                height=info['height'],
+                file_size=info['size'],
+                content_hash=info['sha'],
+                phash=info['phash'],
+                processing_status=Image.STATUS_READY if self.options['no_jobs'] else Image.STATUS_PENDING,
+            ))
+            image_tags.append(self.get_tags(meta.get('tags', []), category))
+
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                self.insert_batch(images, image_tags)
+                break
+            except IntegrityError:
+                # un envoi concurrent a pris des slugs du lot entre-temps :
+                # nouveaux slugs pour ceux-là, puis le lot entier à nouveau
+                clashes = set(Image.objects.filter(
+                    slug__in=[image.slug for image in images]
+                ).values_list('slug', flat=True))
+                if not clashes or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                for image in images:
+                    image.pk = None
+                    if image.slug in clashes:
+                        image.slug = self.slugs.allocate(image.title, refresh=True)
+        cache.bump('images')
+
+        return len(images), handled
+
+    def insert_batch(self, images, image_tags):
+        """Images du lot, tags, tâches, documents de recherche et rollups : une transaction"""
+        with transaction.atomic():
+            Image.objects.bulk_create(images, batch_size=500)
+            # toutes les bases ne renvoient pas les pk de bulk_create (MySQL)
+            pks = dict(Image.objects.filter(
+                slug__in=[image.slug for image in images]
+            ).values_list('slug', 'pk'))
+            for image in images:
+                image.pk = pks[image.slug]
+
+            Image.tags.through.objects.bulk_create([
+                Image.tags.through(image_id=image.pk, tag_id=tag.pk)
+                for image, tags in zip(images, image_tags) for tag in tags
+            ], batch_size=1000)
+            if not self.options['no_jobs']:
+                ProcessingJob.objects.bulk_create(
+                    [ProcessingJob(image_id=image.pk, kind='process_image') for image in images],
+                    batch_size=1000,
+                )
+
+            # ce que les signaux de post_save feraient image par image
+            ImageSearchDocument.objects.bulk_create([
+                ImageSearchDocument(image_id=image.pk, **build_document(image, tags=tags))
+                for image, tags in zip(images, image_tags)
+            ], batch_size=500)
+            per_author = defaultdict(int)
+            for image in images:
+                per_author[image.author_id] += 1
+            today = rollups.day_of(timezone.now())
+            for author_id, n in per_author.items():
+                rollups.bump(author_id, today, images=n)
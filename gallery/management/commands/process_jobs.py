@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gallery.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Worker : exécute les tâches de traitement d'images en attente"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Vider la file puis s'arrêter (au lieu de tourner en boucle)")
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help="Pause entre deux scrutations de la file vide (secondes)")
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help="S'arrêter après N tâches (0 = illimité)")
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        self.stdout.write("Worker démarré.")
+
+        try:
+            while True:
+                requeue_stale_jobs()
+                job = claim_next_job()
+
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                if run_job(job):
+                    processed += 1
+                    self.stdout.write(f"OK     {job}")
+                else:
+                    failed += 1
+                    self.stderr.write(f"ÉCHEC  {job} (tentative {job.attempts}/{job.max_attempts})")
+
+                if options['max_jobs'] and processed + failed >= options['max_jobs']:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"{processed} tâche(s) réussie(s), {failed} échec(s)."))
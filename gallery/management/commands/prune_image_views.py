@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gallery.retention import DEFAULT_BATCH_SIZE, compact_batch, expired_views, get_cutoff, get_retention_days
+
+
+class Command(BaseCommand):
+    help = ("Compacte les vues plus anciennes que la rétention en compteurs quotidiens par image, "
+            "par petits lots (à lancer chaque nuit)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Jours de vues conservées en lignes (défaut : GALLERY_VIEW_RETENTION_DAYS)")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Lignes compactées par transaction")
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help="Pause entre deux lots, en secondes")
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help="Arrêter après ce nombre de lots (la suite au prochain passage)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Compter les vues à compacter sans rien modifier")
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else get_retention_days()
+        cutoff = get_cutoff(days)
+
+        if options['dry_run']:
+            count = expired_views(cutoff).count()
+            self.stdout.write(self.style.SUCCESS(f"{count} vue(s) antérieure(s) au {cutoff:%Y-%m-%d} à compacter."))
+            return
+
+        began = time.perf_counter()
+        total = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            done = compact_batch(cutoff, options['batch_size'])
+            if not done:
+                break
+            total += done
+            batches += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f"lot {batches} : {done} vue(s)")
+            if done < options['batch_size']:
+                break
+            if options['sleep']:
+                # laisser passer les écritures du site entre deux lots
+                time.sleep(options['sleep'])
+        elapsed = time.perf_counter() - began
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} vue(s) antérieure(s) au {cutoff:%Y-%m-%d} compactée(s) en {batches} lot(s), {elapsed:.1f} s."
+        ))
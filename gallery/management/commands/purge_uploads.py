@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gallery.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Supprime les envois par morceaux abandonnés et leurs fichiers temporaires"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24,
+                            help="Âge minimal (depuis le dernier morceau) d'une session abandonnée")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        count = 0
+        for session in UploadSession.objects.filter(updated_at__lt=cutoff):
+            session.discard()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"{count} session(s) supprimée(s)."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from gallery.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        count = backend.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} document(s) indexé(s) ({backend.__class__.__name__})."
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gallery.similarity import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Recalcule entièrement la table des images similaires"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Nombre d'images par lot de co-occurrences")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild_all(batch_size=options['batch_size'], stdout=self.stdout)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"{count} image(s) traitée(s) en {elapsed:.1f} s."))
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from gallery.models import Image, ImageDailyViews, ImageLike, ImageView, Comment
+
+
+def _count_subquery(model):
+    counts = (
+        model.objects.filter(image=OuterRef('pk'))
+        .order_by()
+        .values('image')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _compacted_views_subquery():
+    # vues anciennes remplacées par des compteurs quotidiens (prune_image_views)
+    totals = (
+        ImageDailyViews.objects.filter(image=OuterRef('pk'))
+        .order_by()
+        .values('image')
+        .annotate(n=Sum('views'))
+        .values('n')
+    )
+    return Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs likes/vues/commentaires de Image et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Afficher les écarts sans les corriger")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        counted = (
+            Image.objects.order_by()
+            .annotate(
+                real_likes=_count_subquery(ImageLike),
+                real_views=_count_subquery(ImageView) + _compacted_views_subquery(),
+                real_comments=_count_subquery(Comment),
+            )
+        )
+        drifted = counted.filter(view_sketch__isnull=True).filter(
+            ~Q(likes_count=F('real_likes'))
+            | ~Q(views_count=F('real_views'))
+            | ~Q(comments_count=F('real_comments'))
+        )
+        # mode 'hll' : les vues anonymes sont dans le sketch, pas en lignes
+        sketched = counted.filter(view_sketch__isnull=False).select_related('view_sketch')
+
+        def candidates():
+            yield from drifted.iterator(chunk_size=options['batch_size'])
+            for image in sketched.iterator(chunk_size=options['batch_size']):
+                image.real_views += image.view_sketch.estimate()
+                if (image.likes_count, image.views_count, image.comments_count) != (
+                        image.real_likes, image.real_views, image.real_comments):
+                    yield image
+
+        fixed = []
+        for image in candidates():
+            self.stdout.write(
+                f"{image.slug}: likes {image.likes_count}->{image.real_likes}, "
+                f"vues {image.views_count}->{image.real_views}, "
+                f"commentaires {image.comments_count}->{image.real_comments}"
+            )
+            image.likes_count = image.real_likes
+            image.views_count = image.real_views
+            image.comments_count = image.real_comments
+            fixed.append(image)
+
+        if fixed and not dry_run:
+            Image.objects.bulk_update(
+                fixed,
+                ['likes_count', 'views_count', 'comments_count'],
+                batch_size=options['batch_size'],
+            )
+
+        verb = "à corriger" if dry_run else "corrigée(s)"
+        self.stdout.write(self.style.SUCCESS(f"{len(fixed)} image(s) {verb}."))
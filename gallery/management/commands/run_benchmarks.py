@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_databases, setup_test_environment, \
+    teardown_databases, teardown_test_environment
+
+from gallery.benchmarks import data as bench_data, runner
+from gallery.viewtracking import view_buffer
+
+BUDGETS_PATH = os.path.join(os.path.dirname(runner.__file__), 'budgets.json')
+
+
+class Command(BaseCommand):
+    help = ("Mesure les vues principales sur un jeu de données synthétique "
+            "(requêtes SQL, latence p50/p95, mémoire) dans une base de test")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(bench_data.SCALES), default='small')
+        for name in ('users', 'categories', 'tags', 'images', 'likes', 'views', 'comments'):
+            parser.add_argument(f'--{name}', type=int, help=f"Remplace la valeur de l'échelle pour {name}")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', nargs='+', help="Ne mesurer que ces vues")
+        parser.add_argument('--report', help="Fichier JSON du rapport (défaut : sortie standard)")
+        parser.add_argument('--budgets', default=BUDGETS_PATH)
+        parser.add_argument('--check', action='store_true',
+                            help="Échouer si une vue dépasse son budget (mode régression)")
+        parser.add_argument('--update-budgets', action='store_true',
+                            help="Réécrire le fichier de budgets avec les mesures")
+
+    def handle(self, *args, **options):
+        counts = dict(bench_data.SCALES[options['scale']])
+        counts.update({k: options[k] for k in counts if options.get(k) is not None})
+
+        # base de test et MEDIA_ROOT temporaire : les données réelles ne sont pas touchées
+        media_root = tempfile.mkdtemp(prefix='gallery-bench-')
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                cache.clear()
+                self.stderr.write(f"Jeu de données : {counts}")
+                dataset = bench_data.generate(seed=options['seed'], **counts)
+                report = runner.run(dataset, options['repeat'], only=options['only'])
+                view_buffer.flush()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        report['meta']['scale'] = options['scale']
+        for name, r in report['views'].items():
+            self.stderr.write(f"{name:<15} {r['queries']:4d} requêtes   p50 {r['p50_ms']:8.2f} ms   "
+                              f"p95 {r['p95_ms']:8.2f} ms   mémoire {r['peak_memory_kb']:9.1f} Ko")
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['update_budgets']:
+            with open(options['budgets'], 'w', encoding='utf-8') as f:
+                json.dump(runner.make_budgets(report, options['scale']), f, indent=2, ensure_ascii=False)
+                f.write('\n')
+            self.stderr.write(f"Budgets écrits dans {options['budgets']}")
+
+        if options['check']:
+            budgets = runner.load_budgets(options['budgets'])
+            if budgets.get('scale') != options['scale'] or budgets.get('database') != report['meta']['database']:
+                self.stderr.write(self.style.WARNING(
+                    f"Budgets établis pour {budgets.get('scale')}/{budgets.get('database')}, "
+                    f"mesures en {options['scale']}/{report['meta']['database']}"
+                ))
+            failures = runner.check_budgets(report, budgets)
+            if failures:
+                raise CommandError("Budgets dépassés :\n" + "\n".join(failures))
+            self.stderr.write(self.style.SUCCESS("Toutes les vues tiennent dans leurs budgets."))
@@ -0,0 +1,166 @@
+"""Service des fichiers de MEDIA_ROOT (originaux et déclinaisons).
+
+Deux modes :
+
+- derrière nginx ou Apache (GALLERY_MEDIA_SENDFILE), Django vérifie
+  l'accès puis délègue l'envoi au serveur avec X-Accel-Redirect ou
+  X-Sendfile ; le serveur gère lui-même Range et les requêtes conditionnelles ;
+- sinon le fichier est envoyé par FileResponse, avec ETag fort,
+  Last-Modified, réponses 304/412, requêtes Range (une seule plage) et
+  Cache-Control longue durée.
+
+GALLERY_MEDIA_ACCESS_CHECK peut désigner une fonction (request, path) -> bool
+appelée pour chaque fichier ; False donne une 403 et une réponse non
+partageable par les caches (Cache-Control: private).
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_safe
+
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30 jours ; l'ETag permet la revalidation ensuite
+DEFAULT_ACCEL_PREFIX = '/protected-media/'
+STREAM_BLOCK = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_sendfile_mode():
+    """None, 'x-accel-redirect' (nginx) ou 'x-sendfile' (Apache, lighttpd)"""
+    mode = getattr(settings, 'GALLERY_MEDIA_SENDFILE', None)
+    return mode.lower() if mode else None
+
+
+def get_max_age():
+    return getattr(settings, 'GALLERY_MEDIA_MAX_AGE', DEFAULT_MAX_AGE)
+
+
+def get_access_check():
+    path = getattr(settings, 'GALLERY_MEDIA_ACCESS_CHECK', None)
+    return import_string(path) if path else None
+
+
+def make_etag(stat):
+    """ETag fort à partir de la taille et de la date de modification"""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """(début, fin incluse) pour un en-tête Range d'une seule plage.
+
+    Retourne None si l'en-tête est absent, invalide ou à plusieurs plages
+    (le fichier entier est alors envoyé) ; lève ValueError si la plage
+    est hors du fichier (416).
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # « bytes=-500 » : les 500 derniers octets
+        start = max(size - int(last), 0)
+        end = size - 1
+        if int(last) == 0:
+            raise ValueError(header)
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(STREAM_BLOCK, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _sendfile_response(path, full_path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if get_sendfile_mode() == 'x-accel-redirect':
+        prefix = getattr(settings, 'GALLERY_MEDIA_ACCEL_PREFIX', DEFAULT_ACCEL_PREFIX)
+        response['X-Accel-Redirect'] = quote(prefix.rstrip('/') + '/' + path)
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+@require_safe
+def serve(request, path):
+    """Vue des URL sous MEDIA_URL"""
+    path = posixpath.normpath(path).lstrip('/')
+    # fichiers cachés (checkpoints d'import, .htaccess...) jamais servis
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404("Fichier introuvable")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Fichier introuvable")
+    if not os.path.isfile(full_path):
+        raise Http404("Fichier introuvable")
+
+    check = get_access_check()
+    if check is not None and not check(request, path):
+        raise PermissionDenied
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    cache_control = {'private': True} if check is not None else {'public': True}
+    cache_control['max_age'] = get_max_age()
+
+    if get_sendfile_mode():
+        response = _sendfile_response(path, full_path, content_type)
+        patch_cache_control(response, **cache_control)
+        return response
+
+    stat = os.stat(full_path)
+    etag = make_etag(stat)
+    headers = HttpResponse()
+    headers['ETag'] = etag
+    headers['Last-Modified'] = http_date(stat.st_mtime)
+    headers['Accept-Ranges'] = 'bytes'
+    patch_cache_control(headers, **cache_control)
+
+    # 304 (If-None-Match / If-Modified-Since) ou 412 (If-Match / If-Unmodified-Since)
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime), response=headers)
+    if conditional is not headers:
+        return conditional
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(full_path, start, end - start + 1),
+                                         status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    for header in ('ETag', 'Last-Modified', 'Accept-Ranges', 'Cache-Control'):
+        response[header] = headers[header]
+    return response
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Image = apps.get_model('gallery', 'Image')
+    for image in Image.objects.annotate(
+        n_likes=Count('likes', distinct=True),
+        n_views=Count('views', distinct=True),
+        n_comments=Count('comments', distinct=True),
+    ).iterator():
+        Image.objects.filter(pk=image.pk).update(
+            likes_count=image.n_likes,
+            views_count=image.n_views,
+            comments_count=image.n_comments,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0003_comment_imageview_imagelike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
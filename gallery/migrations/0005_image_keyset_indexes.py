@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0004_image_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['created_at', 'id'], name='image_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='image_cat_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:00
+
+import django.db.models.deletion
+import gallery.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0005_image_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('format', models.CharField(choices=[('jpeg', 'JPEG'), ('webp', 'WebP')], max_length=10)),
+                ('file', models.FileField(max_length=255, upload_to=gallery.models.rendition_upload_path)),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='gallery.image')),
+            ],
+            options={
+                'ordering': ['width'],
+                'unique_together': {('image', 'width', 'format')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def dedupe_views(apps, schema_editor):
+    """Supprimer les doublons (image, user) / (image, ip) avant les contraintes"""
+    Image = apps.get_model('gallery', 'Image')
+    ImageView = apps.get_model('gallery', 'ImageView')
+    touched = set()
+    for key in ('user', 'ip_address'):
+        duplicates = (
+            ImageView.objects.filter(**{f'{key}__isnull': False})
+            .values('image', key)
+            .annotate(n=Count('id'), keep=Min('id'))
+            .filter(n__gt=1)
+        )
+        for dup in duplicates:
+            ImageView.objects.filter(image=dup['image'], **{key: dup[key]}).exclude(id=dup['keep']).delete()
+            touched.add(dup['image'])
+    for image_id in touched:
+        Image.objects.filter(pk=image_id).update(views_count=ImageView.objects.filter(image_id=image_id).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0007_processing_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_views, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='imageview',
+            unique_together={('image', 'ip_address'), ('image', 'user')},
+        ),
+        migrations.CreateModel(
+            name='ImageViewSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registers', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('image', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='view_sketch', to='gallery.image')),
+            ],
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'gallery_image_fts'
+DOCUMENT_TABLE = 'gallery_imagesearchdocument'
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, tags, author,
+        content='{DOCUMENT_TABLE}', content_rowid='image_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, tags, author)
+        VALUES (new.image_id, new.title, new.description, new.tags, new.author);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, tags, author)
+        VALUES ('delete', old.image_id, old.title, old.description, old.tags, old.author);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, tags, author)
+        VALUES ('delete', old.image_id, old.title, old.description, old.tags, old.author);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, tags, author)
+        VALUES (new.image_id, new.title, new.description, new.tags, new.author);
+    END""",
+]
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+MYSQL_FORWARD = [
+    f"ALTER TABLE {DOCUMENT_TABLE} ADD FULLTEXT INDEX image_search_ft (title, description, tags, author)",
+    f"ALTER TABLE {DOCUMENT_TABLE} ADD FULLTEXT INDEX image_search_title_ft (title)",
+]
+MYSQL_BACKWARD = [
+    f"ALTER TABLE {DOCUMENT_TABLE} DROP INDEX image_search_title_ft",
+    f"ALTER TABLE {DOCUMENT_TABLE} DROP INDEX image_search_ft",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_FORWARD, 'mysql': MYSQL_FORWARD}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_BACKWARD, 'mysql': MYSQL_BACKWARD}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def populate_documents(apps, schema_editor):
+    Image = apps.get_model('gallery', 'Image')
+    ImageSearchDocument = apps.get_model('gallery', 'ImageSearchDocument')
+    docs = []
+    for image in Image.objects.select_related('author', 'category').prefetch_related('tags'):
+        tags = [tag.name for tag in image.tags.all()]
+        if image.category_id:
+            tags.append(image.category.name)
+        docs.append(ImageSearchDocument(
+            image_id=image.pk,
+            title=image.title,
+            description=image.description,
+            tags=' '.join(tags),
+            author=image.author.username,
+            category_id=image.category_id,
+        ))
+    ImageSearchDocument.objects.bulk_create(docs, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0008_view_write_behind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageSearchDocument',
+            fields=[
+                ('image', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='gallery.image')),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('tags', models.TextField(blank=True)),
+                ('author', models.CharField(max_length=150)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gallery.category')),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0009_image_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_links', to='gallery.image')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to_links', to='gallery.image')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['image', '-score'], name='similar_image_score_idx')],
+                'unique_together': {('image', 'similar')},
+            },
+        ),
+    ]
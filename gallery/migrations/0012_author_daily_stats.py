@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:12
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def populate_daily_stats(apps, schema_editor):
+    """Historique initial ; ensuite compact_author_stats --all fait de même"""
+    Image = apps.get_model('gallery', 'Image')
+    ImageLike = apps.get_model('gallery', 'ImageLike')
+    ImageView = apps.get_model('gallery', 'ImageView')
+    Comment = apps.get_model('gallery', 'Comment')
+    AuthorDailyStats = apps.get_model('gallery', 'AuthorDailyStats')
+
+    rows = defaultdict(dict)
+    sources = [
+        ('images', Image.objects.all(), 'created_at', 'author_id'),
+        ('likes', ImageLike.objects.all(), 'created_at', 'image__author_id'),
+        ('comments', Comment.objects.all(), 'created_at', 'image__author_id'),
+        ('views', ImageView.objects.all(), 'viewed_at', 'image__author_id'),
+    ]
+    for field, queryset, date_field, author_field in sources:
+        counts = (
+            queryset.annotate(day=TruncDate(date_field))
+            .values_list(author_field, 'day').annotate(n=Count('pk')).order_by()
+        )
+        for author_id, day, n in counts:
+            rows[(author_id, day)][field] = n
+
+    first_likes = (
+        ImageLike.objects.values('image__author_id', 'user_id')
+        .annotate(first=Min('created_at')).order_by()
+    )
+    for row in first_likes:
+        key = (row['image__author_id'], timezone.localdate(row['first']))
+        rows[key]['new_likers'] = rows[key].get('new_likers', 0) + 1
+
+    AuthorDailyStats.objects.bulk_create([
+        AuthorDailyStats(author_id=author_id, day=day, **values)
+        for (author_id, day), values in rows.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0011_image_fingerprints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('images', models.IntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('views', models.IntegerField(default=0)),
+                ('new_likers', models.IntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-day'],
+                'unique_together': {('author', 'day')},
+            },
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
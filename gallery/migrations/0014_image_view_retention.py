@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0013_upload_sessions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='imageview',
+            index=models.Index(fields=['viewed_at', 'image'], name='imageview_viewed_image_idx'),
+        ),
+        migrations.AddField(
+            model_name='imagedailyviews',
+            name='image',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='gallery.image'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='imagedailyviews',
+            unique_together={('image', 'day')},
+        ),
+    ]
@@ -3,10 +3,20 @@ from django.contrib.auth.models import User
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.conf import settings
-from PIL import Image as PilImage
+from django.utils import timezone
 import os
-from django.db.models.signals import post_save
+import uuid
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
+from django.db import transaction
+from django.core.files.base import ContentFile
+from .hll import HyperLogLog
+from .jobs import enqueue, enqueue_once
+from .renditions import rendition_name
+from .slugs import SlugAllocator, save_with_unique_slug
+from .uploads import ALLOWED_TYPES, get_max_size, get_temp_dir, sniff_file
+from . import cache, imaging, pagecache, phash as fingerprints, rollups, search
 
 def image_upload_path(instance, filename):
     name, ext = os.path.splitext(filename)
@@ -14,7 +24,7 @@ def image_upload_path(instance, filename):
 
 # validators
 def validate_image_file_extension(file):
-    valid_mimetypes = ["image/jpeg", "image/png", "image/gif", "image/webp"]
+    valid_mimetypes = ALLOWED_TYPES
     if hasattr(file, 'content_type'):
         if file.content_type not in valid_mimetypes:
             raise ValidationError("Format de fichier non supporté. Utilise JPG, PNG, GIF ou WEBP.")
@@ -23,20 +33,23 @@ def validate_image_file_extension(file):
         ext = os.path.splitext(file.name)[1].lower()
         if ext not in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
             raise ValidationError("Format de fichier non supporté (extension).")
+    # nouveau fichier : le type annoncé doit correspondre à la signature réelle
+    if not getattr(file, '_committed', False) and sniff_file(file) not in valid_mimetypes:
+        raise ValidationError("Le contenu du fichier n'est pas une image JPG, PNG, GIF ou WEBP.")
 
 def validate_image_size(file):
-    max_bytes = 5 * 1024 * 1024  # 5 MB
+    max_bytes = get_max_size()
     if file.size > max_bytes:
-        raise ValidationError("Le fichier est trop lourd (max 5 MB).")
+        raise ValidationError(f"Le fichier est trop lourd (max {max_bytes // (1024 * 1024)} MB).")
 
 class Category(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=80, unique=True, blank=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        save_with_unique_slug(self, self.name, lambda: super(Category, self).save(*args, **kwargs))
 
     def __str__(self):
         return self.name
@@ -52,7 +65,9 @@ class Tag(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            # slug unique dans la catégorie (le nom l'est déjà)
+            allocator = SlugAllocator(Tag, scope={'category_id': self.category_id})
+            self.slug = allocator.allocate(self.name, exclude_pk=self.pk)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -97,52 +112,142 @@ class Image(models.Model):
     height = models.IntegerField(null=True, blank=True)
     file_size = models.IntegerField(null=True, blank=True)
 
+    # empreintes du fichier reçu (voir gallery/phash.py)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    phash = models.BigIntegerField(null=True, blank=True)
+
+    # traitement asynchrone du fichier (voir gallery/jobs.py)
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    PROCESSING_STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_PROCESSING, 'En cours'),
+        (STATUS_READY, 'Prête'),
+        (STATUS_FAILED, 'Échec'),
+    ]
+    processing_status = models.CharField(max_length=20, choices=PROCESSING_STATUS_CHOICES, default=STATUS_READY)
+
+    # compteurs dénormalisés (maintenus par les signaux plus bas)
+    likes_count = models.PositiveIntegerField(default=0)
+    views_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # pagination par curseur sur (-created_at, id)
+            models.Index(fields=['created_at', 'id'], name='image_created_id_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], name='image_cat_created_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # catégorie chargée, pour détecter un changement dans save()
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        return instance
+
+    def category_changed(self):
+        return getattr(self, '_loaded_category_id', None) != self.category_id
 
     def save(self, *args, **kwargs):
-        # créer/mettre à jour le slug
-        if not self.slug:
-            base = self.title or "image"
-            unique = slugify(base)
-            # s'assurer d'unicité simple (peut être améliorée)
-            counter = 1
-            orig = unique
-            while Image.objects.filter(slug=unique).exclude(pk=self.pk).exists():
-                unique = f"{orig}-{counter}"
-                counter += 1
-            self.slug = unique
-
-        super().save(*args, **kwargs)  # sauvegarde initiale pour obtenir le fichier
-
-        # ouvrir l'image physiquement pour extraire métadonnées
+        # nouveau fichier reçu ? (il sera écrit sur le disque par super().save())
+        file_changed = bool(self.image) and not self.image._committed
+
+        if file_changed:
+            self.processing_status = self.STATUS_PENDING
+            self.fingerprint()
+            self.read_dimensions()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'processing_status', 'content_hash', 'phash', 'width', 'height', 'file_size',
+                }
+
+        # seule l'écriture du fichier reste dans la requête ; métadonnées,
+        # redimensionnement et déclinaisons sont faits par le worker
+        def save_and_enqueue():
+            super(Image, self).save(*args, **kwargs)
+            if file_changed:
+                enqueue(self)
+
+        if self.slug:
+            with transaction.atomic():
+                save_and_enqueue()
+        else:
+            # slug libre en une requête, nouvel essai si un envoi concurrent l'a pris
+            save_with_unique_slug(self, self.title or "image", save_and_enqueue)
+        if file_changed:
+            fingerprints.add_to_index(self)
+
+    def fingerprint(self):
+        """Calculer les empreintes du fichier reçu.
+
+        Si le même contenu est déjà stocké, l'image pointe vers ce fichier
+        au lieu d'en écrire une copie.
+        """
+        upload = self.image.file
+        self.content_hash = fingerprints.content_hash(upload)
         try:
-            img_path = self.image.path
-            img = PilImage.open(img_path)
-            self.width, self.height = img.size
-            self.file_size = os.path.getsize(img_path)
-            # Optionnel : redimensionner si trop grande (ex : maxi 4000x4000)
-            max_w, max_h = 4000, 4000
-            if self.width > max_w or self.height > max_h:
-                img.thumbnail((max_w, max_h), PilImage.ANTIALIAS)
-                img.save(img_path)
-                self.width, self.height = img.size
-                self.file_size = os.path.getsize(img_path)
-            super().save(update_fields=['width', 'height', 'file_size'])
-        except Exception:
-            pass
+            self.phash = fingerprints.to_signed(fingerprints.dhash(upload))
+        except (OSError, ValueError):
+            self.phash = None
+        finally:
+            upload.seek(0)
+
+        existing = (
+            Image.objects.filter(content_hash=self.content_hash)
+            .exclude(pk=self.pk).exclude(image='')
+            .values_list('image', flat=True).first()
+        )
+        if existing and self.image.storage.exists(existing):
+            self.image.name = existing
+            self.image._committed = True
+
+    def read_dimensions(self):
+        """Dimensions et poids lus dans l'en-tête du fichier reçu, avant la
+        première écriture ; un original trop grand est réduit en mémoire
+        (draft/reduce) et c'est la version réduite qui est écrite, une fois.
+        """
+        if self.image._committed:
+            # fichier partagé avec une image existante : mêmes métadonnées
+            source = (
+                Image.objects.filter(image=self.image.name).exclude(pk=self.pk)
+                .exclude(width=None).values('width', 'height', 'file_size').first()
+            )
+            if source:
+                self.width, self.height, self.file_size = source['width'], source['height'], source['file_size']
+            return
+
+        upload = self.image.file
+        try:
+            self.width, self.height, _ = imaging.read_header(upload)
+            if imaging.needs_downscale(self.width, self.height):
+                upload.seek(0)
+                data, self.width, self.height = imaging.downscale(upload)
+                self.image.file = ContentFile(data, name=self.image.name)
+                self.file_size = len(data)
+            else:
+                self.file_size = upload.size
+        except (OSError, ValueError):
+            # illisible ici : le worker réessaiera
+            self.width = self.height = self.file_size = None
+        finally:
+            upload.seek(0)
 
     def __str__(self):
         return self.title
     
     def get_views_count(self):
-        return self.views.count()
+        return self.views_count
     
     def get_likes_count(self):
-        return self.likes.count()
+        return self.likes_count
     
     def get_comments_count(self):
-        return self.comments.count()
+        return self.comments_count
     
     def is_liked_by(self, user):
         if user.is_authenticated:
@@ -151,6 +256,129 @@ class Image(models.Model):
 
 
 
+def rendition_upload_path(instance, filename):
+    return rendition_name(instance.image, instance.width, instance.format)
+
+
+class ImageRendition(models.Model):
+    """Déclinaison à largeur fixe d'une image (JPEG ou WebP)"""
+    FORMAT_CHOICES = [('jpeg', 'JPEG'), ('webp', 'WebP')]
+
+    image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='renditions')
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    file = models.FileField(upload_to=rendition_upload_path, max_length=255)
+
+    class Meta:
+        unique_together = ['image', 'width', 'format']
+        ordering = ['width']
+
+    def __str__(self):
+        return f"{self.image.title} {self.width}w ({self.format})"
+
+
+@receiver(post_delete, sender=ImageRendition)
+def delete_rendition_file(sender, instance, **kwargs):
+    """Supprimer le fichier de la déclinaison avec sa dernière ligne"""
+    # les doublons exacts partagent les fichiers de leurs déclinaisons
+    if instance.file and not ImageRendition.objects.filter(file=instance.file.name).exists():
+        instance.file.delete(save=False)
+
+
+class UploadSession(models.Model):
+    """Envoi par morceaux en cours (voir gallery/uploads.py)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveIntegerField()
+    offset = models.PositiveIntegerField(default=0)
+    content_type = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def temp_path(self):
+        return os.path.join(get_temp_dir(), f"{self.pk}.part")
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
+
+    def discard(self):
+        """Supprimer la session et son fichier temporaire"""
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.delete()
+
+
+class ProcessingJob(models.Model):
+    """Tâche de traitement exécutée par `manage.py process_jobs`"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_DONE, 'Terminée'),
+        (STATUS_FAILED, 'Échec'),
+    ]
+
+    image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='jobs')
+    kind = models.CharField(max_length=50, default='process_image')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.image_id} ({self.status})"
+
+
+class SimilarImage(models.Model):
+    """Voisins précalculés d'une image (voir gallery/similarity.py)"""
+    image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='similar_to_links')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ['image', 'similar']
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['image', '-score'], name='similar_image_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.image_id} ~ {self.similar_id} ({self.score:.3f})"
+
+
+class ImageSearchDocument(models.Model):
+    """Document de recherche dénormalisé d'une image (voir gallery/search.py)"""
+    image = models.OneToOneField(Image, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    title = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    tags = models.TextField(blank=True)
+    author = models.CharField(max_length=150)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    def __str__(self):
+        return self.title
+
+
 class ImageView(models.Model):
     """Suivi des vues d'images"""
     image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='views')
@@ -160,6 +388,40 @@ class ImageView(models.Model):
 
     class Meta:
         ordering = ['-viewed_at']
+        # une vue par utilisateur ou par IP (les NULL ne se contredisent pas) ;
+        # ces index uniques servent aussi le dédoublonnage de write_views
+        unique_together = [['image', 'user'], ['image', 'ip_address']]
+        indexes = [
+            # plages de dates (rollups, rétention) : l'image se lit dans l'index
+            models.Index(fields=['viewed_at', 'image'], name='imageview_viewed_image_idx'),
+        ]
+
+
+class ImageDailyViews(models.Model):
+    """Vues compactées d'une image sur une journée (voir gallery/retention.py)"""
+    image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='daily_views')
+    day = models.DateField()
+    views = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['image', 'day']
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.image_id} {self.day} ({self.views})"
+
+
+class ImageViewSketch(models.Model):
+    """Sketch HyperLogLog des visiteurs anonymes d'une image (mode 'hll')"""
+    image = models.OneToOneField(Image, on_delete=models.CASCADE, related_name='view_sketch')
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def get_hll(self):
+        return HyperLogLog.from_bytes(bytes(self.registers)) if self.registers else HyperLogLog()
+
+    def estimate(self):
+        return self.get_hll().estimate()
 
 
 class ImageLike(models.Model):
@@ -188,4 +450,235 @@ class Comment(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"Comment by {self.author.username} on {self.image.title}"
\ No newline at end of file
+        return f"Comment by {self.author.username} on {self.image.title}"
+
+
+class AuthorDailyStats(models.Model):
+    """Activité reçue par un auteur sur une journée (voir gallery/rollups.py)"""
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    images = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    views = models.IntegerField(default=0)
+    new_likers = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['author', 'day']
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.author.username} {self.day}"
+
+
+# compteurs : incréments atomiques F() à chaque création/suppression
+COUNTER_FIELDS = {
+    ImageLike: 'likes_count',
+    ImageView: 'views_count',
+    Comment: 'comments_count',
+}
+
+
+def _deleting_images(origin):
+    """Suppression lancée sur une image ou un queryset d'images : likes, vues et
+    commentaires partent avec elle en cascade, sans travail ligne par ligne
+    (compteurs de l'image supprimée, pages en cache, rollups repris en bloc
+    par rollup_image_children_deleted)"""
+    if isinstance(origin, models.QuerySet):
+        return origin.model is Image
+    return isinstance(origin, Image)
+
+
+@receiver(post_save, sender=ImageLike)
+@receiver(post_save, sender=ImageView)
+@receiver(post_save, sender=Comment)
+def increment_image_counter(sender, instance, created, **kwargs):
+    """Incrémenter le compteur de l'image quand une ligne est créée"""
+    if created:
+        field = COUNTER_FIELDS[sender]
+        Image.objects.filter(pk=instance.image_id).update(**{field: F(field) + 1})
+
+
+@receiver(post_delete, sender=ImageLike)
+@receiver(post_delete, sender=ImageView)
+@receiver(post_delete, sender=Comment)
+def decrement_image_counter(sender, instance, origin=None, **kwargs):
+    """Décrémenter le compteur de l'image quand une ligne est supprimée"""
+    if _deleting_images(origin):
+        return
+    field = COUNTER_FIELDS[sender]
+    Image.objects.filter(pk=instance.image_id, **{f"{field}__gt": 0}).update(
+        **{field: F(field) - 1}
+    )
+
+
+# index de recherche : un document par image, à jour des tags et de l'auteur
+@receiver(post_save, sender=Image)
+def index_image_on_save(sender, instance, **kwargs):
+    search.index_image(instance)
+
+
+@receiver(m2m_changed, sender=Image.tags.through)
+def index_image_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        search.index_image(instance)
+    elif pk_set:
+        search.index_images(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+def index_images_on_label_change(sender, instance, created, **kwargs):
+    if not created:
+        search.index_images(list(instance.images.values_list('pk', flat=True)))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Category)
+def remember_tagged_images(sender, instance, **kwargs):
+    instance._indexed_image_ids = list(instance.images.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def index_images_on_tag_delete(sender, instance, **kwargs):
+    search.index_images(getattr(instance, '_indexed_image_ids', []))
+
+
+@receiver(post_save, sender=User)
+def index_images_on_username_change(sender, instance, created, **kwargs):
+    if not created:
+        ImageSearchDocument.objects.filter(image__author=instance).exclude(
+            author=instance.username
+        ).update(author=instance.username)
+
+
+# cache des catégories, listes de tags et barre de navigation (gallery/cache.py) ;
+# l'index d'autocomplétion des tags suit les mêmes générations
+CACHE_NAMESPACES = {
+    Category: ('categories', 'tags'),  # les listes de tags portent le nom de la catégorie
+    Tag: ('tags',),
+    Image: ('images',),
+}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def bump_cache_generations(sender, **kwargs):
+    cache.bump(*CACHE_NAMESPACES[sender])
+
+
+@receiver(m2m_changed, sender=Image.tags.through)
+def bump_cache_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        cache.bump('images')
+        # pages de détail en cache des images concernées (gallery/pagecache.py)
+        if not reverse:
+            pagecache.bump_images(instance.pk)
+        elif pk_set:
+            pagecache.bump_images(*pk_set)
+
+
+# pages anonymes en cache : version propre à chaque image (gallery/pagecache.py)
+@receiver(post_save, sender=ImageLike)
+@receiver(post_delete, sender=ImageLike)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_image_page(sender, instance, origin=None, **kwargs):
+    if not _deleting_images(origin):
+        pagecache.bump_images(instance.image_id)
+
+
+@receiver(post_save, sender=Image)
+def bump_image_page_on_edit(sender, instance, **kwargs):
+    pagecache.bump_images(instance.pk)
+
+
+# images similaires : recalcul incrémental par le worker
+@receiver(post_save, sender=Image)
+def update_similar_on_category_change(sender, instance, created, **kwargs):
+    if created or instance.category_changed():
+        enqueue_once(instance, 'update_similar')
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(m2m_changed, sender=Image.tags.through)
+def update_similar_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        enqueue_once(instance, 'update_similar')
+    elif pk_set:
+        for image in Image.objects.filter(pk__in=pk_set):
+            enqueue_once(image, 'update_similar')
+
+
+# statistiques quotidiennes des auteurs
+ROLLUP_FIELDS = {
+    ImageLike: ('likes', 'created_at'),
+    ImageView: ('views', 'viewed_at'),
+    Comment: ('comments', 'created_at'),
+}
+
+
+def _image_author_id(instance):
+    if type(instance).image.is_cached(instance):
+        return instance.image.author_id
+    return Image.objects.filter(pk=instance.image_id).values_list('author_id', flat=True).first()
+
+
+def _has_other_like(like, author_id):
+    return ImageLike.objects.filter(user_id=like.user_id, image__author_id=author_id).exclude(pk=like.pk).exists()
+
+
+@receiver(post_save, sender=Image)
+def rollup_image_created(sender, instance, created, **kwargs):
+    if created:
+        rollups.bump(instance.author_id, rollups.day_of(instance.created_at), images=1)
+
+
+@receiver(post_delete, sender=Image)
+def rollup_image_deleted(sender, instance, **kwargs):
+    rollups.bump(instance.author_id, rollups.day_of(instance.created_at), images=-1)
+
+
+@receiver(pre_delete, sender=Image)
+def rollup_image_children_deleted(sender, instance, origin=None, **kwargs):
+    # avant la cascade : les événements de l'image sont encore en base
+    if _deleting_images(origin):
+        rollups.forget_image(instance)
+
+
+@receiver(post_save, sender=ImageLike)
+@receiver(post_save, sender=ImageView)
+@receiver(post_save, sender=Comment)
+def rollup_event_created(sender, instance, created, **kwargs):
+    if not created:
+        return
+    field, date_field = ROLLUP_FIELDS[sender]
+    author_id = _image_author_id(instance)
+    deltas = {field: 1}
+    if sender is ImageLike and not _has_other_like(instance, author_id):
+        deltas['new_likers'] = 1
+    rollups.bump(author_id, rollups.day_of(getattr(instance, date_field)), **deltas)
+
+
+@receiver(post_delete, sender=ImageLike)
+@receiver(post_delete, sender=ImageView)
+@receiver(post_delete, sender=Comment)
+def rollup_event_deleted(sender, instance, origin=None, **kwargs):
+    if _deleting_images(origin):
+        return
+    field, date_field = ROLLUP_FIELDS[sender]
+    author_id = _image_author_id(instance)
+    deltas = {field: -1}
+    # approximatif (jour du like retiré) ; compact_author_stats corrige
+    if sender is ImageLike and not _has_other_like(instance, author_id):
+        deltas['new_likers'] = -1
+    rollups.bump(author_id, rollups.day_of(getattr(instance, date_field)), **deltas)
@@ -0,0 +1,128 @@
+"""Cache de pages complètes pour les visiteurs anonymes (accueil, détail d'image).
+
+Une entrée par URL absolue, qui garde avec le HTML la version des données
+dont la page dépend : générations de cache.py ('images', 'categories'
+pour l'accueil) ou version propre à l'image ('image:<pk>') pour le détail,
+incrémentée par models.py à chaque like, commentaire, changement de tags ou
+modification de l'image. Les compteurs de vues ne l'incrémentent pas : ils
+peuvent retarder de GALLERY_PAGE_CACHE_TIMEOUT secondes.
+
+Reconstruction en vol unique : quand une entrée expire ou change de
+version, un seul worker (verrou posé par cache.add) refait la page ; les
+autres servent l'ancienne pendant ce temps, ou attendent la nouvelle
+quelques instants si rien n'est en cache. Comme pour cache.py, avec locmem
+le verrou et les entrées sont propres à chaque processus.
+
+Ne sont jamais mises en cache les pages d'un utilisateur connecté, d'une
+requête qui a des messages à afficher, ni une réponse qui pose un cookie ou
+un jeton CSRF.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache as django_cache
+from django.http import HttpResponse
+
+from . import cache
+
+DEFAULT_TIMEOUT = 60
+STALE_SECONDS = 60  # durée de vie supplémentaire d'une entrée servie pendant sa reconstruction
+LOCK_TIMEOUT = 10  # secondes ; borne un worker mort pendant la reconstruction
+WAIT_TIMEOUT = 2.0
+WAIT_INTERVAL = 0.05
+
+
+def is_enabled():
+    return getattr(settings, 'GALLERY_PAGE_CACHE', True)
+
+
+def get_timeout():
+    return getattr(settings, 'GALLERY_PAGE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def image_namespace(image_id):
+    return f'image:{image_id}'
+
+
+def bump_images(*image_ids):
+    """Invalider les pages de détail de ces images"""
+    cache.bump(*(image_namespace(pk) for pk in image_ids if pk is not None))
+
+
+def is_cacheable(request):
+    if not is_enabled() or request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # len() ne marque pas les messages comme lus
+    return not len(get_messages(request))
+
+
+def _page_key(request):
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'{cache.KEY_PREFIX}:page:{digest}'
+
+
+def _version(namespaces):
+    return '-'.join(str(cache.generation(ns)) for ns in namespaces)
+
+
+def _response(entry, status):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['X-Page-Cache'] = status
+    return response
+
+
+def _storable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def _wait_for(key, version):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = django_cache.get(key)
+        if entry is not None and entry['version'] == version:
+            return entry
+    return None
+
+
+def serve(request, namespaces, build):
+    """Page en cache pour la version courante de `namespaces`, sinon build()"""
+    key = _page_key(request)
+    version = _version(namespaces)
+    entry = django_cache.get(key)
+    if entry is not None and entry['version'] == version and entry['expires'] > time.time():
+        return _response(entry, 'hit')
+
+    lock = f'{key}:lock'
+    if not django_cache.add(lock, 1, LOCK_TIMEOUT):
+        # un autre worker reconstruit la page
+        if entry is not None:
+            return _response(entry, 'stale')
+        entry = _wait_for(key, version)
+        if entry is not None:
+            return _response(entry, 'hit')
+        return build()
+
+    try:
+        response = build()
+        if _storable(request, response):
+            timeout = get_timeout()
+            django_cache.set(key, {
+                'version': version,
+                'expires': time.time() + timeout,
+                'content': response.content,
+                'content_type': response['Content-Type'],
+            }, timeout + STALE_SECONDS)
+    finally:
+        django_cache.delete(lock)
+    response['X-Page-Cache'] = 'miss'
+    return response
@@ -0,0 +1,119 @@
+"""Pagination par curseur (keyset) sur (-created_at, id).
+
+Contrairement à OFFSET, le coût d'une page ne dépend pas de sa profondeur :
+chaque page repart de la dernière clé vue grâce à l'index (created_at, id).
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 30
+DEFAULT_COMMENTS_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def get_page_size(value=None):
+    """Taille de page demandée, bornée entre 1 et MAX_PAGE_SIZE"""
+    default = getattr(settings, 'GALLERY_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    try:
+        size = int(value) if value else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def get_comments_page_size():
+    return get_page_size(getattr(settings, 'GALLERY_COMMENTS_PAGE_SIZE', DEFAULT_COMMENTS_PAGE_SIZE))
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_parts(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def decode_cursor(cursor):
+    """Retourne (created_at, pk) ou lève InvalidCursor"""
+    try:
+        created_at, pk = _decode_parts(cursor)
+        return datetime.fromisoformat(created_at), int(pk)
+    except ValueError:
+        raise InvalidCursor(cursor)
+
+
+def encode_rank_cursor(score, pk):
+    raw = f"r|{score!r}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_rank_cursor(cursor):
+    """Retourne (score, pk) ou lève InvalidCursor"""
+    try:
+        prefix, score, pk = _decode_parts(cursor)
+        if prefix != 'r':
+            raise ValueError(prefix)
+        return float(score), int(pk)
+    except ValueError:
+        raise InvalidCursor(cursor)
+
+
+def keyset_page(queryset, cursor=None, page_size=None):
+    """Découper un queryset (images, commentaires) en une page + curseur suivant.
+
+    Retourne (items, next_cursor) ; next_cursor vaut None sur la dernière page.
+    """
+    page_size = get_page_size(page_size)
+    queryset = queryset.order_by('-created_at', '-id')
+
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    # une ligne de plus pour savoir s'il reste une page, sans COUNT
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.pk)
+    return items, next_cursor
+
+
+def ranked_page(ranked, queryset, cursor=None, page_size=None):
+    """Paginer des résultats classés [(pk, score)] avec un curseur (score, pk).
+
+    Les pk de la page sont chargés en une requête depuis queryset, dans
+    l'ordre du classement. Retourne (items, next_cursor).
+    """
+    page_size = get_page_size(page_size)
+    ranked = sorted(ranked, key=lambda r: (r[1], r[0]), reverse=True)
+
+    if cursor:
+        score, pk = decode_rank_cursor(cursor)
+        ranked = [(p, s) for p, s in ranked if (s, p) < (score, pk)]
+
+    page = ranked[:page_size]
+    objects = queryset.in_bulk([pk for pk, _ in page])
+    items = [objects[pk] for pk, _ in page if pk in objects]
+
+    next_cursor = None
+    if len(ranked) > page_size:
+        last_pk, last_score = page[-1]
+        next_cursor = encode_rank_cursor(last_score, last_pk)
+    return items, next_cursor
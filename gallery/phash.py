@@ -0,0 +1,181 @@
+"""Empreintes d'images : SHA-256 du contenu et hash perceptuel (dHash 64 bits).
+
+Le SHA-256 repère les copies exactes (qui partagent alors un seul fichier),
+le dHash les quasi-doublons (recadrage léger, recompression, redimension) :
+deux images sont proches si la distance de Hamming de leurs dHash est faible.
+Un BK-tree en mémoire répond à « quels hash à distance <= k ? » sans
+parcourir toute la table.
+"""
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count
+from PIL import Image as PilImage
+
+DEFAULT_DISTANCE = 6
+INDEX_TTL = 300  # secondes
+
+
+def content_hash(fileobj):
+    """SHA-256 hexadécimal d'un fichier Django (File, UploadedFile), lu par morceaux"""
+    digest = hashlib.sha256()
+    for chunk in fileobj.chunks():
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def dhash(source, size=8):
+    """dHash : on compare chaque pixel à son voisin de droite sur une vignette 9x8"""
+    with PilImage.open(source) as img:
+        # JPEG : décodage directement à l'échelle réduite, sans pleine résolution
+        img.draft('L', (size * 16, size * 16))
+        small = img.convert('L').resize((size + 1, size), PilImage.Resampling.LANCZOS)
+        pixels = list(small.getdata())
+
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def to_signed(value):
+    """Entier 64 bits non signé -> valeur stockable dans un BigIntegerField"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def hamming(a, b):
+    return bin(to_unsigned(a) ^ to_unsigned(b)).count('1')
+
+
+class BKTree:
+    """Arbre de Burkhard-Keller sur la distance de Hamming"""
+
+    def __init__(self, items=()):
+        self.root = None
+        self.size = 0
+        for hash_value, key in items:
+            self.add(hash_value, key)
+
+    def add(self, hash_value, key):
+        node = [hash_value, [key], {}]  # hash, clés de ce hash, enfants par distance
+        if self.root is None:
+            self.root = node
+            self.size = 1
+            return
+        current = self.root
+        while True:
+            d = hamming(hash_value, current[0])
+            if d == 0:
+                current[1].append(key)
+                return
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                self.size += 1
+                return
+            current = child
+
+    def search(self, hash_value, max_distance):
+        """[(distance, clé)] triés, pour tous les hash à distance <= max_distance"""
+        if self.root is None:
+            return []
+        results = []
+        stack = [self.root]
+        while stack:
+            node_hash, keys, children = stack.pop()
+            d = hamming(hash_value, node_hash)
+            if d <= max_distance:
+                results.extend((d, key) for key in keys)
+            # inégalité triangulaire : seuls ces sous-arbres peuvent contenir des résultats
+            for child_d, child in children.items():
+                if d - max_distance <= child_d <= d + max_distance:
+                    stack.append(child)
+        results.sort()
+        return results
+
+
+_lock = threading.Lock()
+_state = {'tree': None, 'built_at': 0.0}
+
+
+def get_phash_index():
+    """BK-tree (phash -> pk d'image) du processus, reconstruit après INDEX_TTL"""
+    from .models import Image
+
+    with _lock:
+        if _state['tree'] is None or time.monotonic() - _state['built_at'] > INDEX_TTL:
+            rows = Image.objects.filter(phash__isnull=False).values_list('phash', 'pk')
+            _state['tree'] = BKTree(rows.iterator())
+            _state['built_at'] = time.monotonic()
+        return _state['tree']
+
+
+def add_to_index(image):
+    if image.phash is not None and _state['tree'] is not None:
+        with _lock:
+            _state['tree'].add(image.phash, image.pk)
+
+
+def find_near_duplicates(image, max_distance=None):
+    """[(distance, Image)] proches de `image`, elle-même exclue"""
+    from .models import Image
+
+    if image.phash is None:
+        return []
+    if max_distance is None:
+        max_distance = getattr(settings, 'GALLERY_DUPLICATE_DISTANCE', DEFAULT_DISTANCE)
+    matches = [
+        (d, pk) for d, pk in get_phash_index().search(image.phash, max_distance)
+        if pk != image.pk
+    ]
+    images = Image.objects.select_related('author').in_bulk([pk for _, pk in matches])
+    # l'arbre peut garder l'ancien hash d'une image dont le fichier a changé
+    results = [
+        (hamming(image.phash, images[pk].phash), images[pk])
+        for _, pk in matches if pk in images and images[pk].phash is not None
+    ]
+    return sorted((r for r in results if r[0] <= max_distance), key=lambda r: (r[0], r[1].pk))
+
+
+def exact_duplicate_groups():
+    """[[Image, ...], ...] : images de même SHA-256, la plus ancienne d'abord"""
+    from .models import Image
+
+    hashes = (
+        Image.objects.exclude(content_hash='').order_by()
+        .values('content_hash').annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('content_hash', flat=True)
+    )
+    groups = defaultdict(list)
+    for image in Image.objects.filter(content_hash__in=list(hashes)).select_related('author').order_by('pk'):
+        groups[image.content_hash].append(image)
+    return list(groups.values())
+
+
+def near_duplicate_pairs(max_distance=None):
+    """[(distance, Image, Image)] pour les paires proches de contenu différent"""
+    from .models import Image
+
+    if max_distance is None:
+        max_distance = getattr(settings, 'GALLERY_DUPLICATE_DISTANCE', DEFAULT_DISTANCE)
+    rows = list(Image.objects.filter(phash__isnull=False).values_list('pk', 'phash', 'content_hash'))
+    tree = BKTree((h, pk) for pk, h, _ in rows)
+    hashes = {pk: sha for pk, _, sha in rows}
+
+    pairs = []
+    for pk, h, sha in rows:
+        for d, other in tree.search(h, max_distance):
+            if other > pk and not (sha and hashes[other] == sha):
+                pairs.append((d, pk, other))
+    images = Image.objects.select_related('author').in_bulk({pk for _, a, b in pairs for pk in (a, b)})
+    return [(d, images[a], images[b]) for d, a, b in sorted(pairs)]
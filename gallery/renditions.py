@@ -0,0 +1,109 @@
+"""Déclinaisons (renditions) à largeur fixe des images publiées.
+
+Les pages de liste n'ont pas besoin de l'original (jusqu'à 4000px / 5 MB) :
+on produit quelques largeurs fixes en JPEG et WebP, enregistrées dans
+ImageRendition, et le tag {% responsive_img %} construit srcset/sizes.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image as PilImage, ImageOps
+
+DEFAULT_WIDTHS = (320, 640, 1280)
+FORMATS = {
+    # format : (extension, options d'encodage PIL)
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+}
+
+
+def get_rendition_widths():
+    return tuple(sorted(getattr(settings, 'GALLERY_RENDITION_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def build_renditions(source, widths=None):
+    """Encoder les déclinaisons d'un fichier image (chemin ou objet fichier).
+
+    Fonction pure (aucun accès base ni stockage) pour pouvoir tourner dans un
+    processus séparé. Retourne une liste de dicts
+    {width, height, format, content} ; aucune largeur n'est agrandie.
+    """
+    widths = widths or get_rendition_widths()
+    results = []
+
+    with PilImage.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        src_w, src_h = img.size
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+
+        for width in widths:
+            if width >= src_w:
+                continue
+            height = max(1, round(src_h * width / src_w))
+            resized = img.resize((width, height), PilImage.Resampling.LANCZOS)
+
+            for fmt, (ext, options) in FORMATS.items():
+                frame = resized
+                if fmt == 'jpeg' and frame.mode != 'RGB':
+                    frame = frame.convert('RGB')
+                elif fmt == 'webp' and frame.mode not in ('RGB', 'RGBA'):
+                    frame = frame.convert('RGBA' if has_alpha else 'RGB')
+                buffer = io.BytesIO()
+                frame.save(buffer, format=fmt.upper(), **options)
+                results.append({
+                    'width': width,
+                    'height': height,
+                    'format': fmt,
+                    'content': buffer.getvalue(),
+                })
+
+    return results
+
+
+def rendition_name(image, width, fmt):
+    """gallery/<user>/renditions/<nom>-<largeur>.<ext>"""
+    directory, filename = os.path.split(image.image.name)
+    stem = os.path.splitext(filename)[0]
+    return f"{directory}/renditions/{stem}-{width}.{FORMATS[fmt][0]}"
+
+
+def store_renditions(image, renditions):
+    """Enregistrer les fichiers encodés et remplacer les lignes ImageRendition"""
+    from .models import ImageRendition
+
+    # supprimer les anciennes déclinaisons (fichiers compris, via post_delete)
+    for old in image.renditions.all():
+        old.delete()
+
+    objs = []
+    for r in renditions:
+        obj = ImageRendition(image=image, width=r['width'], height=r['height'], format=r['format'])
+        # le nom final est calculé par rendition_upload_path
+        obj.file.save(os.path.basename(image.image.name), ContentFile(r['content']), save=False)
+        objs.append(obj)
+    ImageRendition.objects.bulk_create(objs)
+    return objs
+
+
+def share_renditions(image, source):
+    """Reprendre les déclinaisons d'une image au contenu identique, sans copier les fichiers"""
+    from .models import ImageRendition
+
+    for old in image.renditions.all():
+        old.delete()
+    return ImageRendition.objects.bulk_create([
+        ImageRendition(image=image, width=r.width, height=r.height, format=r.format, file=r.file.name)
+        for r in source.renditions.all()
+    ])
+
+
+def generate_renditions(image):
+    """Produire et enregistrer les déclinaisons d'une image (dans le processus courant)"""
+    image.image.open('rb')
+    try:
+        renditions = build_renditions(image.image)
+    finally:
+        image.image.close()
+    return store_renditions(image, renditions)
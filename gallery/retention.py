@@ -0,0 +1,103 @@
+"""Rétention des vues : compaction des lignes ImageView anciennes.
+
+Les lignes ImageView de plus de GALLERY_VIEW_RETENTION_DAYS jours sont
+remplacées par des compteurs (image, jour, vues) dans ImageDailyViews, par
+lots de quelques centaines de lignes, chacun dans sa propre transaction
+courte : pas de verrou long sur la table pendant que le site écrit ses vues.
+
+La suppression passe à côté des signaux : views_count et AuthorDailyStats
+gardent ces vues, qui restent comptées par ImageDailyViews (recount_counters
+et compact_author_stats les additionnent aux lignes restantes).
+
+Pas de partitionnement MySQL par viewed_at à la place : MySQL exige la
+colonne de partition dans chaque clé unique, clé primaire comprise, et
+refuse les clés étrangères sur une table partitionnée. Il faudrait perdre
+les contraintes (image, user) et (image, ip_address) qui dédoublonnent les
+vues, ainsi que les clés étrangères vers Image et User. La compaction
+quotidienne borne la taille de la table, et l'index (viewed_at, image)
+donne aux purges le même parcours par plage qu'un DROP PARTITION.
+
+Conséquence : le dédoublonnage par utilisateur ou par IP ne vaut plus que
+sur la fenêtre de rétention ; un visiteur qui revient après la compaction
+de sa vue est compté une nouvelle fois.
+
+    python manage.py prune_image_views
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .rollups import day_of
+
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_retention_days():
+    return getattr(settings, 'GALLERY_VIEW_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+
+
+def get_cutoff(days=None, today=None):
+    """Début (minuit local) du plus ancien jour conservé en lignes brutes"""
+    if days is None:
+        days = get_retention_days()
+    first_kept = (today or day_of()) - timedelta(days=days)
+    moment = datetime.combine(first_kept, time.min)
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+
+def expired_views(cutoff):
+    from .models import ImageView
+
+    return ImageView.objects.filter(viewed_at__lt=cutoff)
+
+
+def compact_batch(cutoff, batch_size=DEFAULT_BATCH_SIZE):
+    """Compacter les batch_size plus anciennes vues avant cutoff ; retourne le nombre traité"""
+    from .models import ImageDailyViews, ImageView
+
+    db = router.db_for_write(ImageView)
+    with transaction.atomic(using=db):
+        # lignes lues et verrouillées par l'index (viewed_at, image)
+        rows = list(
+            expired_views(cutoff).select_for_update()
+            .order_by('viewed_at', 'pk')
+            .values_list('pk', 'image_id', 'viewed_at')[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        counts = Counter((image_id, day_of(viewed_at)) for _, image_id, viewed_at in rows)
+        existing = {
+            (daily.image_id, daily.day): daily for daily in
+            ImageDailyViews.objects.select_for_update().filter(
+                image_id__in={image_id for image_id, _ in counts},
+                day__in={day for _, day in counts},
+            )
+        }
+        missing = []
+        for key, n in counts.items():
+            if key in existing:
+                existing[key].views = F('views') + n
+            else:
+                image_id, day = key
+                missing.append(ImageDailyViews(image_id=image_id, day=day, views=n))
+        if existing:
+            ImageDailyViews.objects.bulk_update(existing.values(), ['views'])
+        ImageDailyViews.objects.bulk_create(missing)
+
+        # DELETE en SQL, sans signaux : compteurs et rollups restent inchangés
+        connection = connections[db]
+        table = connection.ops.quote_name(ImageView._meta.db_table)
+        column = connection.ops.quote_name(ImageView._meta.pk.column)
+        placeholders = ', '.join(['%s'] * len(rows))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {column} IN ({placeholders})',
+                [pk for pk, _, _ in rows],
+            )
+    return len(rows)
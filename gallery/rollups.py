@@ -0,0 +1,216 @@
+"""Statistiques quotidiennes par auteur (AuthorDailyStats).
+
+Une ligne par (auteur, jour) : images publiées, likes, commentaires et vues
+reçus ce jour-là, et nouveaux « likers » (personnes qui aiment une image de
+l'auteur pour la première fois). Les totaux comme les fenêtres de 30 jours
+de profile_view sont alors des sommes sur l'index (author, day).
+
+Les lignes sont tenues à jour par les signaux de models.py et par le vidage
+des vues (viewtracking.py) ; la suppression d'une image retire ses
+événements en quelques requêtes groupées (forget_image) ; `python manage.py compact_author_stats`,
+lancé chaque nuit, les recalcule depuis les tables d'événements pour
+corriger les écarts (suppressions, nouveaux likers) et retire les lignes
+vides.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Min, Q, Sum, Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+FIELDS = ('images', 'likes', 'comments', 'views', 'new_likers')
+DEFAULT_PERIOD = 30  # jours
+
+
+def day_of(moment=None):
+    return timezone.localdate(moment) if moment else timezone.localdate()
+
+
+def bump(author_id, day, **deltas):
+    """Ajouter des deltas (éventuellement négatifs) à la ligne (auteur, jour)"""
+    from .models import AuthorDailyStats
+
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or author_id is None:
+        return
+    rows = AuthorDailyStats.objects.filter(author_id=author_id, day=day)
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if rows.update(**changes):
+        return
+    if all(delta < 0 for delta in deltas.values()):
+        # rien à décrémenter (ligne compactée, auteur en cours de suppression)
+        return
+    try:
+        with transaction.atomic():
+            AuthorDailyStats.objects.create(author_id=author_id, day=day, **deltas)
+    except IntegrityError:
+        # ligne créée entre-temps par une autre requête
+        rows.update(**changes)
+
+
+def forget_image(image):
+    """Retirer des lignes de l'auteur les likes, commentaires et vues d'une
+    image sur le point d'être supprimée, par jour, en une requête par type"""
+    from .models import Comment, ImageDailyViews, ImageLike, ImageView
+
+    likes = ImageLike.objects.filter(image_id=image.pk)
+    other_likers = (
+        ImageLike.objects.filter(image__author_id=image.author_id)
+        .exclude(image_id=image.pk).values('user_id')
+    )
+    counts = {
+        'likes': _daily_counts(likes, 'created_at', 'image__author_id'),
+        # approximatif comme pour un like retiré ; compact_author_stats corrige
+        'new_likers': _daily_counts(likes.exclude(user_id__in=other_likers), 'created_at', 'image__author_id'),
+        'comments': _daily_counts(Comment.objects.filter(image_id=image.pk), 'created_at', 'image__author_id'),
+        'views': _daily_counts(ImageView.objects.filter(image_id=image.pk), 'viewed_at', 'image__author_id'),
+    }
+    for day, n in ImageDailyViews.objects.filter(image_id=image.pk).values_list('day', 'views'):
+        key = (image.author_id, day)
+        counts['views'][key] = counts['views'].get(key, 0) + n
+
+    deltas = defaultdict(dict)
+    for field, by_key in counts.items():
+        for key, n in by_key.items():
+            deltas[key][field] = -n
+    for (author_id, day), changes in deltas.items():
+        bump(author_id, day, **changes)
+
+
+def author_stats(author, period=DEFAULT_PERIOD, today=None):
+    """Totaux, période courante et période précédente, en une requête.
+
+    Retourne {'total': {...}, 'recent': {...}, 'previous': {...}, 'growth': {...}}
+    où chaque dict a les clés de FIELDS ; growth est en pourcentage (None si
+    la période précédente est vide).
+    """
+    from .models import AuthorDailyStats
+
+    today = today or day_of()
+    recent_start = today - timedelta(days=period - 1)
+    previous_start = recent_start - timedelta(days=period)
+
+    aggregates = {}
+    for field in FIELDS:
+        aggregates[f'total_{field}'] = Sum(field)
+        aggregates[f'recent_{field}'] = Sum(field, filter=Q(day__gte=recent_start))
+        aggregates[f'previous_{field}'] = Sum(
+            field, filter=Q(day__gte=previous_start, day__lt=recent_start)
+        )
+    row = AuthorDailyStats.objects.filter(author=author).aggregate(**aggregates)
+
+    stats = {
+        scope: {field: max(0, row[f'{scope}_{field}'] or 0) for field in FIELDS}
+        for scope in ('total', 'recent', 'previous')
+    }
+    stats['growth'] = {
+        field: (
+            (stats['recent'][field] - stats['previous'][field]) / stats['previous'][field] * 100
+            if stats['previous'][field] else None
+        )
+        for field in FIELDS
+    }
+    return stats
+
+
+def _daily_counts(queryset, date_field, author_field):
+    """{(author_id, jour): n} pour un queryset d'événements"""
+    rows = (
+        queryset.annotate(day=TruncDate(date_field))
+        .values_list(author_field, 'day')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    return {(author_id, day): n for author_id, day, n in rows}
+
+
+def compute(start=None, end=None):
+    """Recalculer les lignes depuis les événements, pour les jours [start, end]
+
+    Retourne {(author_id, jour): {champ: valeur}}.
+    """
+    from .models import Image, ImageDailyViews, ImageLike, ImageView, Comment
+    from .viewtracking import tracking_mode
+
+    def in_range(queryset, field):
+        if start:
+            queryset = queryset.filter(**{f'{field}__date__gte': start})
+        if end:
+            queryset = queryset.filter(**{f'{field}__date__lte': end})
+        return queryset
+
+    counts = {
+        'images': _daily_counts(in_range(Image.objects.all(), 'created_at'), 'created_at', 'author_id'),
+        'likes': _daily_counts(in_range(ImageLike.objects.all(), 'created_at'), 'created_at', 'image__author_id'),
+        'comments': _daily_counts(in_range(Comment.objects.all(), 'created_at'), 'created_at', 'image__author_id'),
+    }
+    if tracking_mode() == 'rows':
+        views = _daily_counts(in_range(ImageView.objects.all(), 'viewed_at'), 'viewed_at', 'image__author_id')
+        # vues anciennes compactées par prune_image_views (gallery/retention.py)
+        compacted = ImageDailyViews.objects.all()
+        if start:
+            compacted = compacted.filter(day__gte=start)
+        if end:
+            compacted = compacted.filter(day__lte=end)
+        for author_id, day, n in (
+            compacted.values_list('image__author_id', 'day').annotate(n=Sum('views')).order_by()
+        ):
+            views[(author_id, day)] = views.get((author_id, day), 0) + n
+        counts['views'] = views
+
+    # premier like de chaque personne sur les images de chaque auteur
+    first_likes = (
+        ImageLike.objects.values('image__author_id', 'user_id')
+        .annotate(first=Min('created_at'))
+        .order_by()
+    )
+    if start:
+        first_likes = first_likes.filter(first__date__gte=start)
+    if end:
+        first_likes = first_likes.filter(first__date__lte=end)
+    new_likers = defaultdict(int)
+    for row in first_likes:
+        new_likers[(row['image__author_id'], day_of(row['first']))] += 1
+    counts['new_likers'] = new_likers
+
+    result = defaultdict(dict)
+    for field, by_key in counts.items():
+        for key, n in by_key.items():
+            result[key][field] = n
+    return result
+
+
+def compact(start=None, end=None, batch_size=500):
+    """Remplacer les lignes des jours [start, end] par leurs valeurs exactes.
+
+    Les vues sont conservées telles quelles en mode 'hll' (les visiteurs
+    anonymes n'ont pas de ligne ImageView). Retourne le nombre de lignes écrites.
+    """
+    from .models import AuthorDailyStats
+    from .viewtracking import tracking_mode
+
+    computed = compute(start, end)
+    rows = AuthorDailyStats.objects.all()
+    if start:
+        rows = rows.filter(day__gte=start)
+    if end:
+        rows = rows.filter(day__lte=end)
+
+    with transaction.atomic():
+        kept_views = {}
+        if tracking_mode() != 'rows':
+            kept_views = {(a, d): v for a, d, v in rows.filter(views__gt=0).values_list('author_id', 'day', 'views')}
+        rows.delete()
+
+        objs = []
+        for key in set(computed) | set(kept_views):
+            values = dict(computed.get(key, {}))
+            if key in kept_views:
+                values['views'] = kept_views[key]
+            if any(values.values()):
+                author_id, day = key
+                objs.append(AuthorDailyStats(author_id=author_id, day=day, **values))
+        AuthorDailyStats.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
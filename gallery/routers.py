@@ -0,0 +1,124 @@
+"""Lectures sur les répliques, écritures sur le primaire.
+
+PrimaryReplicaRouter envoie les écritures sur le primaire (DATABASES
+'default', ou GALLERY_PRIMARY_DATABASE) et les lectures des requêtes web
+sur une des répliques de GALLERY_READ_REPLICAS, tirée une fois par requête.
+Restent sur le primaire :
+
+- tout ce qui s'exécute hors requête (commandes, worker des jobs, vidage des
+  vues en arrière-plan), qui lit souvent ce qu'il va écrire ;
+- les lectures dans un bloc transaction.atomic() (select_for_update compris) ;
+- les requêtes POST/PUT/PATCH/DELETE, et une requête dès sa première écriture ;
+- les requêtes d'un visiteur qui a écrit depuis moins de
+  GALLERY_REPLICA_STICKY_SECONDS secondes : ReplicaRoutingMiddleware pose
+  alors un cookie, pour qu'il voie ses propres likes et commentaires malgré
+  le retard de réplication.
+
+Sans réplique configurée, tout va sur le primaire comme avant.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULT_STICKY_SECONDS = 15
+STICKY_COOKIE = 'gallery_primary'
+
+# état de routage de la requête en cours (None hors requête)
+_current = ContextVar('gallery_db_routing', default=None)
+
+
+def get_primary():
+    return getattr(settings, 'GALLERY_PRIMARY_DATABASE', DEFAULT_DB_ALIAS)
+
+
+def get_replicas():
+    return list(getattr(settings, 'GALLERY_READ_REPLICAS', []))
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'GALLERY_REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+
+
+class RoutingState:
+    """Choix de la requête : réplique tirée, épinglage sur le primaire, écriture faite"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        replicas = get_replicas()
+        self.replica = random.choice(replicas) if replicas else None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        primary = get_primary()
+        state = _current.get()
+        if state is None or state.pinned or state.replica is None:
+            return primary
+        if connections[primary].in_atomic_block:
+            return primary
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            # la suite de la requête doit relire ce qu'elle vient d'écrire
+            state.wrote = state.pinned = True
+        return get_primary()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {get_primary(), *get_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # le schéma des répliques vient de la réplication
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """À placer avant SessionMiddleware pour que sessions et utilisateur soient routés aussi"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = self.start(request)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(response, state)
+
+    def start(self, request):
+        unsafe = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        return RoutingState(pinned=unsafe or STICKY_COOKIE in request.COOKIES)
+
+    def finish(self, response, state):
+        seconds = get_sticky_seconds()
+        if state.wrote and seconds and get_replicas():
+            response.set_cookie(STICKY_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,193 @@
+"""Recherche plein texte classée sur le titre, la description, les tags et l'auteur.
+
+Chaque image a un document dénormalisé (ImageSearchDocument) tenu à jour
+par les signaux de models.py. Le moteur dépend de la base :
+
+- MySQL : index FULLTEXT sur la table des documents (MATCH ... AGAINST) ;
+  les mots que l'index InnoDB ignore (trop courts, mots vides) sont retirés
+  de la requête, et sans mot indexable on se replie sur icontains ;
+- SQLite : table virtuelle FTS5 à contenu externe, synchronisée par triggers,
+  classement bm25 (pour le développement et les tests) ;
+- autre : repli sur icontains, sans pertinence.
+
+Les index eux-mêmes sont créés par la migration 0009.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+DEFAULT_MAX_RESULTS = 1000
+DEFAULT_MIN_TOKEN_SIZE = 3  # innodb_ft_min_token_size par défaut
+# liste par défaut d'InnoDB (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+INNODB_STOPWORDS = frozenset("""
+    a about an are as at be by com de en for from how i in is it la of on or
+    that the this to was what when where who will with und www
+""".split())
+FTS_TABLE = 'gallery_image_fts'
+DOCUMENT_TABLE = 'gallery_imagesearchdocument'
+
+
+def tokenize(q):
+    return re.findall(r'\w+', q or '')
+
+
+def build_document(image, tags=None):
+    """Champs du document de recherche d'une image (tags : déjà chargés, sinon image.tags)"""
+    tags = [tag.name for tag in (image.tags.all() if tags is None else tags)]
+    if image.category_id:
+        tags.append(image.category.name)
+    return {
+        'title': image.title,
+        'description': image.description,
+        'tags': ' '.join(tags),
+        'author': image.author.username,
+        'category_id': image.category_id,
+    }
+
+
+def index_image(image):
+    from .models import ImageSearchDocument
+    ImageSearchDocument.objects.update_or_create(image_id=image.pk, defaults=build_document(image))
+
+
+def index_images(image_ids):
+    from .models import Image
+    for image in Image.objects.filter(pk__in=image_ids).select_related('author', 'category').prefetch_related('tags'):
+        index_image(image)
+
+
+class BaseSearchBackend:
+    def search(self, q, category_id=None, limit=None):
+        """Retourne [(image_id, score)] triés du plus pertinent au moins pertinent"""
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=500):
+        """Régénérer tous les documents depuis les images"""
+        from .models import Image, ImageSearchDocument
+
+        ImageSearchDocument.objects.all().delete()
+        images = Image.objects.order_by('pk').select_related('author', 'category').prefetch_related('tags')
+        batch = []
+        count = 0
+        for image in images.iterator(chunk_size=batch_size):
+            batch.append(ImageSearchDocument(image_id=image.pk, **build_document(image)))
+            if len(batch) >= batch_size:
+                ImageSearchDocument.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        ImageSearchDocument.objects.bulk_create(batch)
+        return count + len(batch)
+
+    def _limit(self, limit):
+        return limit or getattr(settings, 'GALLERY_SEARCH_MAX_RESULTS', DEFAULT_MAX_RESULTS)
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """Repli sans index : tous les mots doivent apparaître quelque part"""
+
+    def search(self, q, category_id=None, limit=None):
+        from .models import ImageSearchDocument
+
+        docs = ImageSearchDocument.objects.all()
+        if category_id is not None:
+            docs = docs.filter(category_id=category_id)
+        for token in tokenize(q):
+            docs = docs.filter(
+                Q(title__icontains=token) | Q(description__icontains=token)
+                | Q(tags__icontains=token) | Q(author__icontains=token)
+            )
+        ids = docs.order_by('-image_id').values_list('image_id', flat=True)[:self._limit(limit)]
+        return [(pk, 0.0) for pk in ids]
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    # poids bm25 par colonne : title, description, tags, author
+    WEIGHTS = (10.0, 2.0, 5.0, 3.0)
+
+    def search(self, q, category_id=None, limit=None):
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+        # chaque mot comme préfixe, tous requis
+        match = ' '.join('"%s"*' % t for t in tokens)
+        weights = ', '.join(str(w) for w in self.WEIGHTS)
+        sql = (
+            f"SELECT f.rowid, -bm25({FTS_TABLE}, {weights}) AS score "
+            f"FROM {FTS_TABLE} f "
+        )
+        params = [match]
+        where = f"WHERE {FTS_TABLE} MATCH %s"
+        if category_id is not None:
+            sql += f"JOIN {DOCUMENT_TABLE} d ON d.image_id = f.rowid "
+            where += " AND d.category_id = %s"
+            params.append(category_id)
+        sql += where + " ORDER BY score DESC, f.rowid DESC LIMIT %s"
+        params.append(self._limit(limit))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(pk, float(score)) for pk, score in cursor.fetchall()]
+
+    def rebuild(self, batch_size=500):
+        count = super().rebuild(batch_size)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        return count
+
+
+class MySQLFulltextSearchBackend(BaseSearchBackend):
+    TITLE_BOOST = 2.0
+
+    def indexable(self, tokens):
+        """Mots présents dans l'index FULLTEXT : un +mot* absent de l'index
+        ne trouverait rien et viderait tout le résultat"""
+        min_size = getattr(settings, 'GALLERY_SEARCH_MIN_TOKEN_SIZE', DEFAULT_MIN_TOKEN_SIZE)
+        return [t for t in tokens if len(t) >= min_size and t.lower() not in INNODB_STOPWORDS]
+
+    def search(self, q, category_id=None, limit=None):
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+        indexable = self.indexable(tokens)
+        if not indexable:
+            # « le », « ab »... : sous-chaînes, sans pertinence
+            return IcontainsSearchBackend().search(q, category_id=category_id, limit=limit)
+        tokens = indexable
+        # mode booléen : chaque mot requis, en préfixe
+        against = ' '.join(f'+{t}*' for t in tokens)
+        sql = (
+            f"SELECT image_id, "
+            f"MATCH(title, description, tags, author) AGAINST (%s IN BOOLEAN MODE) "
+            f"+ {self.TITLE_BOOST} * MATCH(title) AGAINST (%s IN BOOLEAN MODE) AS score "
+            f"FROM {DOCUMENT_TABLE} "
+            f"WHERE MATCH(title, description, tags, author) AGAINST (%s IN BOOLEAN MODE)"
+        )
+        params = [against, against, against]
+        if category_id is not None:
+            sql += " AND category_id = %s"
+            params.append(category_id)
+        sql += " ORDER BY score DESC, image_id DESC LIMIT %s"
+        params.append(self._limit(limit))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(pk, float(score)) for pk, score in cursor.fetchall()]
+
+
+BACKENDS_BY_VENDOR = {
+    'sqlite': SQLiteFTS5SearchBackend,
+    'mysql': MySQLFulltextSearchBackend,
+}
+
+
+def get_backend():
+    path = getattr(settings, 'GALLERY_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    return BACKENDS_BY_VENDOR.get(connection.vendor, IcontainsSearchBackend)()
+
+
+def search_images(q, category_id=None, limit=None):
+    return get_backend().search(q, category_id=category_id, limit=limit)
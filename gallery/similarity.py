@@ -0,0 +1,176 @@
+"""Table matérialisée des images similaires.
+
+Score d'un voisin = tags communs (Jaccard sur Image.tags) + même catégorie
++ popularité du voisin. Les NEIGHBORS meilleurs voisins de chaque image sont
+stockés dans SimilarImage ; image_detail les lit en une requête indexée.
+
+- incrémental : tâche 'update_similar' (gallery/jobs.py) quand les tags ou
+  la catégorie d'une image changent ;
+- complet : `python manage.py rebuild_similar_images`, co-occurrences des
+  tags calculées en SQL par lots d'images.
+"""
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+TAG_WEIGHT = 0.6
+CATEGORY_WEIGHT = 0.25
+POPULARITY_WEIGHT = 0.15
+NEIGHBORS = 12
+CATEGORY_CANDIDATES = 50
+
+
+class Scorer:
+    """Contexte partagé par un calcul : popularité maximale, tags par image..."""
+
+    def __init__(self):
+        from .models import Image
+        max_likes = Image.objects.aggregate(m=Max('likes_count'))['m'] or 0
+        self.log_max = math.log1p(max_likes)
+        self.category_candidates = {}
+
+    def popularity(self, likes):
+        return math.log1p(likes) / self.log_max if self.log_max else 0.0
+
+    def score(self, shared, n_tags_a, n_tags_b, same_category, likes_b):
+        union = n_tags_a + n_tags_b - shared
+        jaccard = shared / union if union else 0.0
+        return (
+            TAG_WEIGHT * jaccard
+            + CATEGORY_WEIGHT * (1.0 if same_category else 0.0)
+            + POPULARITY_WEIGHT * self.popularity(likes_b)
+        )
+
+
+def _tag_counts(image_ids):
+    from .models import Image
+    through = Image.tags.through
+    return dict(
+        through.objects.filter(image_id__in=image_ids)
+        .values('image_id').annotate(n=Count('tag_id')).values_list('image_id', 'n')
+    )
+
+
+def _shared_tags(image_ids):
+    """{image_id: {autre_image_id: nb de tags communs}} pour un lot d'images"""
+    from .models import Image
+    through = Image.tags.through
+    rows = (
+        through.objects.filter(image_id__in=image_ids)
+        .values_list('image_id', 'tag__images')
+        .annotate(shared=Count('tag_id'))
+        .order_by()
+    )
+    shared = defaultdict(dict)
+    for image_id, other_id, n in rows:
+        if other_id != image_id:
+            shared[image_id][other_id] = n
+    return shared
+
+
+def _category_candidates(category_ids, cache):
+    """Les images les plus aimées de chaque catégorie (candidats sans tag commun)"""
+    from .models import Image
+    for category_id in category_ids:
+        if category_id not in cache:
+            cache[category_id] = list(
+                Image.objects.filter(category_id=category_id)
+                .order_by('-likes_count', '-id')
+                .values_list('id', flat=True)[:CATEGORY_CANDIDATES]
+            )
+    return cache
+
+
+def compute_neighbors(image_ids, scorer=None):
+    """{image_id: [(voisin_id, score), ...]} triés, NEIGHBORS au plus"""
+    from .models import Image
+
+    scorer = scorer or Scorer()
+    image_ids = list(image_ids)
+    shared = _shared_tags(image_ids)
+    categories = dict(Image.objects.filter(pk__in=image_ids).values_list('id', 'category_id'))
+    by_category = _category_candidates({c for c in categories.values() if c}, scorer.category_candidates)
+
+    candidate_ids = set()
+    for image_id in image_ids:
+        candidate_ids.update(shared.get(image_id, {}))
+        candidate_ids.update(by_category.get(categories.get(image_id), ()))
+    info = {
+        pk: (category_id, likes)
+        for pk, category_id, likes in Image.objects.filter(pk__in=candidate_ids)
+        .values_list('id', 'category_id', 'likes_count')
+    }
+    tag_counts = _tag_counts(set(image_ids) | candidate_ids)
+
+    result = {}
+    for image_id in image_ids:
+        category_id = categories.get(image_id)
+        n_tags = tag_counts.get(image_id, 0)
+        candidates = set(shared.get(image_id, {})) | set(by_category.get(category_id, ()))
+        candidates.discard(image_id)
+
+        scored = []
+        for other_id in candidates:
+            if other_id not in info:
+                continue
+            other_category, other_likes = info[other_id]
+            scored.append((other_id, scorer.score(
+                shared.get(image_id, {}).get(other_id, 0),
+                n_tags,
+                tag_counts.get(other_id, 0),
+                category_id is not None and category_id == other_category,
+                other_likes,
+            )))
+        scored.sort(key=lambda s: (-s[1], -s[0]))
+        result[image_id] = scored[:NEIGHBORS]
+    return result
+
+
+def store_neighbors(neighbors):
+    """Remplacer les lignes SimilarImage des images données"""
+    from .models import SimilarImage
+    SimilarImage.objects.filter(image_id__in=neighbors).delete()
+    SimilarImage.objects.bulk_create([
+        SimilarImage(image_id=image_id, similar_id=other_id, score=score)
+        for image_id, scored in neighbors.items()
+        for other_id, score in scored
+    ])
+
+
+def update_image(image):
+    """Mise à jour incrémentale après un changement de tags ou de catégorie.
+
+    Recalcule la liste de l'image, puis celle de ses voisins anciens et
+    nouveaux, dont le score vis-à-vis de cette image a pu changer.
+    """
+    from .models import SimilarImage
+
+    scorer = Scorer()
+    with transaction.atomic():
+        own = compute_neighbors([image.pk], scorer)
+        affected = {other_id for other_id, _ in own.get(image.pk, [])}
+        affected.update(SimilarImage.objects.filter(similar_id=image.pk).values_list('image_id', flat=True))
+        affected.discard(image.pk)
+
+        neighbors = dict(own)
+        if affected:
+            neighbors.update(compute_neighbors(affected, scorer))
+        store_neighbors(neighbors)
+
+
+def rebuild_all(batch_size=200, stdout=None):
+    """Recalcul complet, par lots d'images ; retourne le nombre d'images traitées"""
+    from .models import Image, SimilarImage
+
+    scorer = Scorer()
+    ids = list(Image.objects.order_by('pk').values_list('pk', flat=True))
+    SimilarImage.objects.all().delete()
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        with transaction.atomic():
+            store_neighbors(compute_neighbors(batch, scorer))
+        if stdout:
+            stdout.write(f"{min(start + batch_size, len(ids))}/{len(ids)}")
+    return len(ids)
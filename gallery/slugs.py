@@ -0,0 +1,77 @@
+"""Attribution de slugs uniques : « titre », « titre-1 », « titre-2 »...
+
+Une seule requête par préfixe (slug = base OU slug LIKE 'base-%', servie
+par l'index du slug) suffit pour connaître les suffixes pris. Deux envois
+simultanés peuvent quand même choisir le même slug : save_with_unique_slug()
+réessaie alors avec le suffixe suivant sur IntegrityError.
+
+SlugAllocator garde en mémoire les slugs déjà attribués, pour les imports en
+masse (bulk_create) qui ne passent pas par save() ; import_images relance
+alors le lot avec de nouveaux slugs sur IntegrityError.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 5
+SUFFIX_ROOM = 8  # place gardée pour « -1234567 »
+
+
+class SlugAllocator:
+    """Slugs uniques pour un modèle, éventuellement dans un périmètre (ex. catégorie)"""
+
+    def __init__(self, model, field='slug', scope=None, fallback=None):
+        self.model = model
+        self.field = field
+        self.scope = scope or {}
+        self.fallback = fallback or model._meta.model_name
+        self.max_length = model._meta.get_field(field).max_length
+        self._taken = {}
+
+    def base_for(self, text):
+        base = slugify(text or '')[:self.max_length - SUFFIX_ROOM].strip('-')
+        return base or self.fallback
+
+    def _load(self, base, exclude_pk=None):
+        """Slugs pris pour ce préfixe : une requête"""
+        queryset = self.model._default_manager.filter(
+            Q(**{self.field: base}) | Q(**{f'{self.field}__startswith': f'{base}-'}),
+            **self.scope,
+        )
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+        return set(queryset.values_list(self.field, flat=True))
+
+    def allocate(self, text, exclude_pk=None, refresh=False):
+        """Prochain slug libre pour `text`, réservé dans cet allocateur.
+
+        refresh relit la base ; les slugs déjà réservés ici le restent.
+        """
+        base = self.base_for(text)
+        if refresh or base not in self._taken:
+            self._taken[base] = self._load(base, exclude_pk) | self._taken.get(base, set())
+        taken = self._taken[base]
+
+        slug = base
+        if slug in taken:
+            prefix = f'{base}-'
+            suffixes = {int(s[len(prefix):]) for s in taken if s.startswith(prefix) and s[len(prefix):].isdigit()}
+            slug = f'{prefix}{max(suffixes, default=0) + 1}'
+        taken.add(slug)
+        return slug
+
+
+def save_with_unique_slug(instance, text, save, field='slug', scope=None):
+    """Attribuer un slug libre puis appeler save() ; nouvel essai si un
+    enregistrement concurrent a pris le même slug entre-temps."""
+    allocator = SlugAllocator(type(instance), field, scope)
+    for attempt in range(MAX_ATTEMPTS):
+        setattr(instance, field, allocator.allocate(text, exclude_pk=instance.pk, refresh=attempt > 0))
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            slug = getattr(instance, field)
+            clash = type(instance)._default_manager.filter(**{field: slug}).exclude(pk=instance.pk).exists()
+            if not clash or attempt == MAX_ATTEMPTS - 1:
+                raise
@@ -0,0 +1,135 @@
+"""Index des tags en mémoire pour l'autocomplétion.
+
+Chaque processus garde tous les tags (nom normalisé, catégorie, popularité
+= nombre d'images) et répond aux recherches par préfixe et par sous-chaîne
+sans requête SQL. Les lignes viennent des listes de tags de gallery/cache.py ;
+l'index est reconstruit quand les générations 'tags' ou 'images' changent
+(signaux de models.py) ou après GALLERY_TAG_INDEX_TTL secondes.
+
+Les générations ne sont partagées entre processus que si le cache l'est
+aussi (fichier, memcached, redis, base) ; avec locmem, seul le TTL
+s'applique aux autres processus.
+"""
+import bisect
+import threading
+import time
+import unicodedata
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+
+from . import cache
+
+DEFAULT_TTL = 300
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+TagEntry = namedtuple('TagEntry', 'id name key category_id category popularity')
+
+
+def normalize(text):
+    """Minuscules sans accents : « Été » -> « ete »"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def _trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class TagIndex:
+    def __init__(self, entries):
+        # position dans self.entries = rang de popularité
+        self.entries = sorted(entries, key=lambda e: (-e.popularity, e.key))
+        self.sorted_keys = sorted((e.key, pos) for pos, e in enumerate(self.entries))
+        self.trigrams = defaultdict(set)
+        for pos, entry in enumerate(self.entries):
+            for gram in _trigrams(entry.key):
+                self.trigrams[gram].add(pos)
+
+    @classmethod
+    def build(cls):
+        return cls(
+            TagEntry(t['id'], t['name'], normalize(t['name']), category_id, t['category'], t['popularity'])
+            for category_id, tags in cache.get_tag_lists().items()
+            for t in tags
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _prefix_positions(self, q):
+        start = bisect.bisect_left(self.sorted_keys, (q,))
+        positions = set()
+        for key, pos in self.sorted_keys[start:]:
+            if not key.startswith(q):
+                break
+            positions.add(pos)
+        return positions
+
+    def _infix_positions(self, q):
+        if len(q) < 3:
+            return {pos for pos, e in enumerate(self.entries) if q in e.key}
+        grams = sorted(_trigrams(q), key=lambda g: len(self.trigrams.get(g, ())))
+        candidates = set(self.trigrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates &= self.trigrams.get(gram, set())
+            if not candidates:
+                break
+        return {pos for pos in candidates if q in self.entries[pos].key}
+
+    def search(self, query='', category_id=None, limit=DEFAULT_LIMIT):
+        """Préfixes d'abord, puis sous-chaînes ; chaque groupe par popularité.
+
+        limit=None renvoie tous les tags retenus (liste complète d'une catégorie).
+        """
+        q = normalize(query)
+        if q:
+            prefix = self._prefix_positions(q)
+            infix = self._infix_positions(q) - prefix
+            positions = sorted(prefix) + sorted(infix)
+        else:
+            positions = range(len(self.entries))
+
+        results = []
+        for pos in positions:
+            entry = self.entries[pos]
+            if category_id is not None and entry.category_id != category_id:
+                continue
+            results.append(entry)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'version': None, 'built_at': 0.0}
+
+
+def get_tag_index():
+    ttl = getattr(settings, 'GALLERY_TAG_INDEX_TTL', DEFAULT_TTL)
+    version = (cache.generation('tags'), cache.generation('images'))
+
+    def stale():
+        return (
+            _state['index'] is None
+            or _state['version'] != version
+            or time.monotonic() - _state['built_at'] > ttl
+        )
+
+    if stale():
+        with _lock:
+            if stale():
+                _state['index'] = TagIndex.build()
+                _state['version'] = version
+                _state['built_at'] = time.monotonic()
+    return _state['index']
+
+
+def get_limit(value=None):
+    default = getattr(settings, 'GALLERY_TAG_AUTOCOMPLETE_LIMIT', DEFAULT_LIMIT)
+    try:
+        limit = int(value) if value else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MAX_LIMIT))
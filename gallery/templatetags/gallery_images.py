@@ -0,0 +1,48 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+DEFAULT_SIZES = "100vw"
+
+
+def _srcset(renditions):
+    return ", ".join(f"{r.file.url} {r.width}w" for r in renditions)
+
+
+@register.simple_tag
+def responsive_img(image, sizes=DEFAULT_SIZES, **attrs):
+    """Balise <picture> avec srcset WebP/JPEG à partir des ImageRendition.
+
+    Utiliser prefetch_related('renditions') sur les listes pour éviter une
+    requête par image. Sans déclinaison, on retombe sur l'original.
+    Les attributs supplémentaires (alt, class, loading, ...) vont sur <img>.
+    """
+    attrs.setdefault('alt', image.title)
+    if image.width and image.height:
+        attrs.setdefault('width', image.width)
+        attrs.setdefault('height', image.height)
+    extra = format_html_join(' ', '{}="{}"', ((k.replace('_', '-'), v) for k, v in attrs.items()))
+
+    renditions = list(image.renditions.all())
+    jpeg = [r for r in renditions if r.format == 'jpeg']
+    webp = [r for r in renditions if r.format == 'webp']
+
+    if not jpeg:
+        return format_html('<img src="{}" {}>', image.image.url, extra)
+
+    # l'original reste le candidat le plus large
+    if image.width:
+        jpeg_srcset = f"{_srcset(jpeg)}, {image.image.url} {image.width}w"
+    else:
+        jpeg_srcset = _srcset(jpeg)
+
+    source = ""
+    if webp:
+        source = format_html('<source type="image/webp" srcset="{}" sizes="{}">', _srcset(webp), sizes)
+
+    img = format_html(
+        '<img src="{}" srcset="{}" sizes="{}" {}>',
+        jpeg[0].file.url, jpeg_srcset, sizes, extra,
+    )
+    return format_html('<picture>{}{}</picture>', source, img)
@@ -0,0 +1,23 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from gallery import cache
+
+register = template.Library()
+
+
+@register.simple_tag
+def category_nav(current_category=None):
+    """Barre de filtre par catégorie, rendue une fois par génération 'categories'.
+
+    Une entrée de cache par catégorie active (slug), plus une pour « Tout ».
+    """
+    def build():
+        return render_to_string("gallery/_category_nav.html", {
+            "categories": cache.get_categories(),
+            "current_category": current_category,
+        })
+
+    name = f"category-nav:{current_category or ''}"
+    return mark_safe(cache.get_or_build(name, ("categories",), build))
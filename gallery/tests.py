@@ -1,3 +1,206 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from pathlib import Path
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image as PilImage
+
+from .imaging import MAX_DIMENSION, ORIENTATION_TAG, downscale, read_header
+from .models import AuthorDailyStats, Category, Comment, Image, ImageLike, ImageView
+from .routers import STICKY_COOKIE, PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from .tagindex import DEFAULT_LIMIT, TagEntry, TagIndex
+
+PRIMARY, REPLICA = 'router_primary', 'router_replica'
+
+routing = override_settings(
+    DATABASE_ROUTERS=['gallery.routers.PrimaryReplicaRouter'],
+    GALLERY_PRIMARY_DATABASE=PRIMARY,
+    GALLERY_READ_REPLICAS=[REPLICA],
+    GALLERY_REPLICA_STICKY_SECONDS=30,
+)
+
+
+def count_categories(request):
+    return HttpResponse(str(Category.objects.count()))
+
+
+def create_category(request):
+    Category.objects.create(name=request.POST['name'], slug=request.POST['name'])
+    return HttpResponse(str(Category.objects.count()))
+
+
+@routing
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Primaire et réplique : deux fichiers SQLite, la réplique copiée une fois
+    puis jamais mise à jour, comme une réplique très en retard."""
+    # alias ajoutés dans setUpClass, après la préparation des bases par le runner
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = Path(tempfile.mkdtemp(prefix='gallery-router-'))
+        connections.settings.update(connections.configure_settings({
+            **connections.settings,
+            PRIMARY: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(cls.tmpdir / 'primary.sqlite3')},
+            REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(cls.tmpdir / 'replica.sqlite3')},
+        }))
+        super().setUpClass()
+        with routing:
+            call_command('migrate', database=PRIMARY, verbosity=0)
+            Category.objects.create(name='Répliquée', slug='repliquee')
+        connections[PRIMARY].close()
+        shutil.copyfile(cls.tmpdir / 'primary.sqlite3', cls.tmpdir / 'replica.sqlite3')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in (PRIMARY, REPLICA):
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        # écrite après la copie : seul le primaire la voit
+        Category.objects.update_or_create(slug='primaire', defaults={'name': 'Primaire'})
+        self.factory = RequestFactory()
+
+    def get(self, view, cookies=None):
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies or {})
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Category), PRIMARY)
+        self.assertEqual(Category.objects.count(), 2)
+
+    def test_get_reads_from_replica(self):
+        response = self.get(count_categories)
+        self.assertEqual(response.content, b'1')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_write_reads_own_writes_and_sets_sticky_cookie(self):
+        request = self.factory.post('/', {'name': 'nouvelle'})
+        response = ReplicaRoutingMiddleware(create_category)(request)
+        self.assertEqual(response.content, b'3')
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 30)
+        self.assertTrue(Category.objects.using(PRIMARY).filter(slug='nouvelle').exists())
+        self.assertFalse(Category.objects.using(REPLICA).filter(slug='nouvelle').exists())
+        Category.objects.filter(slug='nouvelle').delete()
+
+    def test_sticky_cookie_pins_reads_to_primary(self):
+        self.assertEqual(self.get(count_categories, {STICKY_COOKIE: '1'}).content, b'2')
+
+    def test_reads_in_atomic_block_use_primary(self):
+        def locked_count(request):
+            with transaction.atomic(using=PRIMARY):
+                return HttpResponse(str(len(Category.objects.select_for_update())))
+
+        self.assertEqual(self.get(locked_count).content, b'2')
+
+    def test_async_view_reads_from_replica(self):
+        async def view(request):
+            return HttpResponse(str(await sync_to_async(Category.objects.count)()))
+
+        request = AsyncRequestFactory().get('/')
+        response = async_to_sync(ReplicaRoutingMiddleware(view))(request)
+        self.assertEqual(response.content, b'1')
+
+    def test_replicas_are_not_migrated(self):
+        router = PrimaryReplicaRouter()
+        self.assertFalse(router.allow_migrate(REPLICA, 'gallery'))
+        self.assertIsNone(router.allow_migrate(PRIMARY, 'gallery'))
+
+
+class DownscaleTests(SimpleTestCase):
+    """Originaux au-delà de 2 x MAX_DIMENSION : chemin reduce() hors JPEG"""
+
+    def encode(self, img, fmt, **options):
+        buffer = io.BytesIO()
+        img.save(buffer, format=fmt, **options)
+        buffer.seek(0)
+        return buffer
+
+    def test_palette_image_is_downscaled(self):
+        source = self.encode(PilImage.new('P', (2 * MAX_DIMENSION + 500, 60)), 'PNG')
+        data, width, height = downscale(source)
+        self.assertEqual((width, height), (MAX_DIMENSION, 28))
+        with PilImage.open(io.BytesIO(data)) as result:
+            self.assertEqual((result.format, result.mode), ('PNG', 'P'))
+
+    def test_gif_is_downscaled(self):
+        source = self.encode(PilImage.new('P', (60, 2 * MAX_DIMENSION + 500)), 'GIF')
+        _, width, height = downscale(source)
+        self.assertEqual(height, MAX_DIMENSION)
+
+    def test_exif_orientation_survives_reduce(self):
+        exif = PilImage.Exif()
+        exif[ORIENTATION_TAG] = 6  # rotation de 90° à l'affichage
+        source = self.encode(PilImage.new('RGB', (2 * MAX_DIMENSION + 1000, 100)), 'PNG', exif=exif.tobytes())
+        data, width, height = downscale(source)
+        self.assertEqual(height, MAX_DIMENSION)
+        self.assertLess(width, height)
+        with PilImage.open(io.BytesIO(data)) as result:
+            self.assertNotIn(ORIENTATION_TAG, result.getexif())
+        # l'en-tête du résultat donne les mêmes dimensions que l'image produite
+        self.assertEqual(read_header(io.BytesIO(data))[:2], (width, height))
+
+
+class TagIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = TagIndex(
+            TagEntry(pk, f'tag {pk}', f'tag {pk}', category_id, str(category_id), pk)
+            for category_id in (1, 2)
+            for pk in range(category_id * 100, category_id * 100 + DEFAULT_LIMIT + 10)
+        )
+
+    def test_empty_search_without_limit_returns_whole_category(self):
+        tags = self.index.search('', category_id=1, limit=None)
+        self.assertEqual(len(tags), DEFAULT_LIMIT + 10)
+        self.assertEqual({tag.category_id for tag in tags}, {1})
+
+    def test_search_is_restricted_to_category(self):
+        tags = self.index.search('tag', category_id=2)
+        self.assertEqual(len(tags), DEFAULT_LIMIT)
+        self.assertEqual({tag.category_id for tag in tags}, {2})
+
+
+class ImageDeleteTests(TestCase):
+    """Likes, vues et commentaires supprimés en cascade sans travail par ligne"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='auteur')
+        cls.visitors = [User.objects.create(username=f'visiteur{i}') for i in range(20)]
+
+    def make_image(self, n):
+        image = Image.objects.create(title='Cascade', author=self.author, image='gallery/cascade.png')
+        for i, visitor in enumerate(self.visitors[:n]):
+            ImageLike.objects.create(image=image, user=visitor)
+            ImageView.objects.create(image=image, ip_address=f'10.0.0.{i}')
+            Comment.objects.create(image=image, author=visitor, content='!')
+        return Image.objects.get(pk=image.pk)
+
+    def delete_queries(self, image):
+        with CaptureQueriesContext(connection) as queries:
+            image.delete()
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_children(self):
+        self.assertEqual(self.delete_queries(self.make_image(1)), self.delete_queries(self.make_image(20)))
+
+    def test_author_stats_lose_deleted_events(self):
+        self.make_image(1)
+        self.make_image(5).delete()
+        totals = {
+            field: sum(AuthorDailyStats.objects.filter(author=self.author).values_list(field, flat=True))
+            for field in ('images', 'likes', 'views', 'comments', 'new_likers')
+        }
+        self.assertEqual(totals, {'images': 1, 'likes': 1, 'views': 1, 'comments': 1, 'new_likers': 1})
@@ -0,0 +1,141 @@
+"""Envoi d'images par morceaux, avec reprise.
+
+Le navigateur ouvre une session (nom + taille annoncée), puis envoie le
+fichier en morceaux successifs, chacun avec l'offset auquel il commence.
+Chaque morceau est écrit directement dans un fichier temporaire, sans
+garder le fichier en mémoire :
+
+- le type est reconnu sur les premiers octets (signature), pas sur le nom ;
+- la taille maximale est vérifiée avant la session puis pendant l'écriture ;
+- après une coupure, GET sur la session donne le dernier offset confirmé
+  et l'envoi reprend de là.
+
+Une fois le fichier complet, la publication passe par ImageUploadForm
+comme un envoi classique.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+DEFAULT_MAX_SIZE = 5 * 1024 * 1024  # 5 MB
+DEFAULT_CHUNK_SIZE = 512 * 1024
+READ_BLOCK = 64 * 1024
+SNIFF_BYTES = 12
+
+ALLOWED_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+
+
+class UploadRejected(Exception):
+    """Envoi refusé ; status est le code HTTP à renvoyer"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_max_size():
+    return getattr(settings, 'GALLERY_MAX_UPLOAD_SIZE', DEFAULT_MAX_SIZE)
+
+
+def get_chunk_size():
+    return getattr(settings, 'GALLERY_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def get_temp_dir():
+    path = getattr(settings, 'GALLERY_UPLOAD_TEMP_DIR', None) or os.path.join(tempfile.gettempdir(), 'gallery-uploads')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def sniff_image_type(head):
+    """Type MIME d'après la signature du fichier, ou None"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def sniff_file(fileobj):
+    """sniff_image_type() sur les premiers octets d'un fichier, position conservée"""
+    position = fileobj.tell()
+    fileobj.seek(0)
+    head = fileobj.read(SNIFF_BYTES)
+    fileobj.seek(position)
+    return sniff_image_type(head)
+
+
+def check_declared_size(size):
+    if size <= 0:
+        raise UploadRejected("Fichier vide.")
+    if size > get_max_size():
+        raise UploadRejected(f"Le fichier est trop lourd (max {get_max_size() // (1024 * 1024)} MB).", status=413)
+
+
+def append_chunk(session, offset, stream):
+    """Écrire un morceau reçu à `offset` ; retourne le nouvel offset confirmé.
+
+    Le morceau est lu par blocs depuis `stream` (la requête) dans un fichier
+    temporaire qui lui est propre, puis ajouté au fichier de la session une
+    fois l'offset réservé. Un offset qui ne correspond pas au dernier offset
+    confirmé lève UploadRejected(409) : le client doit relire l'offset et
+    reprendre. Un contenu qui n'est pas une image ou qui dépasse la taille
+    annoncée lève UploadRejected et supprime la session.
+    """
+    from .models import UploadSession
+
+    if offset != session.offset:
+        raise UploadRejected("Offset inattendu.", status=409)
+
+    # supprimé à la fermeture, même si l'envoi est refusé ou interrompu
+    with tempfile.TemporaryFile(dir=get_temp_dir()) as chunk:
+        written = 0
+        if offset == 0:
+            head = stream.read(SNIFF_BYTES)
+            content_type = sniff_image_type(head)
+            if content_type not in ALLOWED_TYPES:
+                session.discard()
+                raise UploadRejected("Format de fichier non supporté. Utilise JPG, PNG, GIF ou WEBP.", status=415)
+            session.content_type = content_type
+            chunk.write(head)
+            written += len(head)
+
+        while True:
+            block = stream.read(READ_BLOCK)
+            if not block:
+                break
+            written += len(block)
+            if offset + written > session.size:
+                session.discard()
+                raise UploadRejected("Le fichier dépasse la taille annoncée.", status=413)
+            chunk.write(block)
+
+        # Un seul envoi peut faire avancer l'offset (reprise du client pendant
+        # qu'un envoi au même offset est encore en cours) : l'UPDATE
+        # conditionnel verrouille la session jusqu'à la fin de la transaction,
+        # donc le fichier n'est modifié que par l'envoi qui a gagné, un à la fois.
+        with transaction.atomic():
+            updated = UploadSession.objects.filter(pk=session.pk, offset=offset).update(
+                offset=offset + written, content_type=session.content_type, updated_at=timezone.now(),
+            )
+            if not updated:
+                raise UploadRejected("Offset inattendu.", status=409)
+
+            path = session.temp_path
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                # tout octet au-delà de l'offset confirmé vient d'un envoi interrompu
+                f.seek(offset)
+                f.truncate()
+                chunk.seek(0)
+                shutil.copyfileobj(chunk, f, READ_BLOCK)
+
+    session.offset = offset + written
+    return session.offset
@@ -11,14 +11,23 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('login/', login_view, name='login'),
     path('api/tags/', views.get_tags_by_category, name='get_tags_by_category'),
+    path('api/feed/', views.image_feed, name='image_feed'),
+    path('api/likes/', views.like_states, name='like_states'),
+    path('api/images/', views.api_images, name='api_images'),
+    path('api/images/<slug:slug>/', views.api_image, name='api_image'),
+    path('api/uploads/', views.upload_session_create, name='upload_session_create'),
+    path('api/uploads/<uuid:session_id>/', views.upload_session_chunk, name='upload_session_chunk'),
+    path('api/uploads/<uuid:session_id>/complete/', views.upload_session_complete, name='upload_session_complete'),
     path('image/<slug:slug>/', views.image_detail, name='image_detail'),
     path('image/<slug:slug>/like/', views.toggle_like, name='toggle_like'),
     path('image/<slug:slug>/comment/', views.add_comment, name='add_comment'),
+    path('image/<slug:slug>/comments/', views.comments_page, name='comments_page'),
     path('comment/<int:comment_id>/delete/', views.delete_comment, name='delete_comment'),
     path('profile/', views.profile_view, name='profile'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
     path('image/<slug:slug>/edit/', views.edit_image, name='edit_image'),
     path('image/<slug:slug>/delete/', views.delete_image, name='delete_image'),
     path("get-tags/", views.get_all_tags, name="get_all_tags"),
+    path('api/debug/timings/', views.instrumentation_stats, name='instrumentation_stats'),
 
 ]
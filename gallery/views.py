@@ -1,4 +1,6 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import os
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
 from django.contrib.auth import logout, authenticate, login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -6,31 +8,99 @@ from django.contrib.auth.models import User
 from .forms import SignUpForm, ImageUploadForm
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
 from .models import Image, Category, Tag
 from django.db.models import Count, Q
-from .models import Image, Category, Tag, ImageLike, ImageView, Comment
-from django.views.decorators.http import require_POST
+from .models import Image, Category, Tag, ImageLike, ImageView, Comment, UploadSession
+from django.views.decorators.http import require_POST, require_safe
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.contrib.admin.views.decorators import staff_member_required
+from .cache import get_categories, get_category
+from . import api, instrumentation, likes, pagecache
+from .pagination import get_comments_page_size, keyset_page, ranked_page, InvalidCursor
+from .phash import find_near_duplicates
+from .rollups import author_stats
+from .search import search_images
+from .uploads import UploadRejected, append_chunk, check_declared_size, get_chunk_size
+from .tagindex import get_tag_index, get_limit as get_tag_limit
+from .viewtracking import record_view
 
 
-def index(request):
+def _listing_images(category=None):
+    """Queryset commun aux pages de liste (accueil, catégorie, flux JSON)"""
+    images = Image.objects.select_related('author__profile').prefetch_related('renditions')
+
+    if category is not None:
+        images = images.filter(category=category)
+
+    return images
+
+
+def _listing_page(request, category=None, use_cursor=True):
+    """Page d'images + curseur suivant ; classée par pertinence si `q` est fourni.
+
+    Lève InvalidCursor si le curseur ne correspond pas au mode de tri.
+    """
+    images = _listing_images(category=category)
     q = request.GET.get("q")
-    images = Image.objects.all()
+    cursor = request.GET.get("cursor") if use_cursor else None
+    limit = request.GET.get("limit")
 
     if q:
-        images = images.filter(title__icontains=q)
+        ranked = search_images(q, category_id=category.pk if category else None)
+        return ranked_page(ranked, images, cursor, limit)
+
+    return keyset_page(images, cursor, limit)
 
-    categories = Category.objects.all()
 
+def index(request):
+    if pagecache.is_cacheable(request):
+        # visiteurs anonymes : page complète en cache (voir gallery/pagecache.py)
+        return pagecache.serve(request, ('images', 'categories'), lambda: _render_index(request))
+    return _render_index(request)
+
+
+def _render_index(request):
+    try:
+        images, next_cursor = _listing_page(request)
+    except InvalidCursor:
+        images, next_cursor = _listing_page(request, use_cursor=False)
+
+    # la barre des catégories vient du cache ({% category_nav %})
     return render(request, "gallery/index.html", {
         "images": images,
-        "categories": categories,
+        "next_cursor": next_cursor,
         "current_category": None,   # Aucune catégorie active ici
     })
 
 
+def image_feed(request):
+    """Page suivante de cartes (défilement infini) avec un curseur opaque"""
+    category = None
+    category_slug = request.GET.get("category")
+    if category_slug:
+        category = get_category(category_slug)
+        if category is None:
+            raise Http404("Catégorie introuvable")
+
+    try:
+        images, next_cursor = _listing_page(request, category=category)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Curseur invalide'}, status=400)
+
+    html = render_to_string("gallery/_image_cards.html", {"images": images}, request=request)
+
+    return JsonResponse({
+        'html': html,
+        'count': len(images),
+        'next_cursor': next_cursor,
+    })
+
+
 def signup(request):
     if request.method == 'POST':
         form = SignUpForm(request.POST)
@@ -59,50 +129,65 @@ def login_view(request):
     return render(request, 'gallery/login.html')
 
 def category_view(request, slug):
-    category = Category.objects.get(slug=slug)
-    images = Image.objects.filter(category=category)
-    categories = Category.objects.all()
+    category = get_category(slug)
+    if category is None:
+        raise Http404("Catégorie introuvable")
+
+    try:
+        images, next_cursor = _listing_page(request, category=category)
+    except InvalidCursor:
+        images, next_cursor = _listing_page(request, category=category, use_cursor=False)
 
     return render(request, "gallery/index.html", {   
         "images": images,
-        "categories": categories,
+        "next_cursor": next_cursor,
         "current_category": slug,   
     })
 
 
-@login_required
-def get_tags_by_category(request):
-    category_id = request.GET.get("category")
-    search = request.GET.get("search", "")
+# Points d'accès JSON en vues asynchrones : sous ASGI elles tournent dans la
+# boucle d'événements et seuls les appels ORM (aget_or_create, adelete...)
+# passent par le thread de sync_to_async, au lieu de la vue entière.
 
-    tags = Tag.objects.all()
+def _tag_filters(request, search):
+    """Catégorie (?category=) et limite d'une recherche de tags.
+
+    Sans texte ni ?limit=, toute la liste est renvoyée : le formulaire la
+    filtre ensuite lui-même.
+    """
+    category_id = request.GET.get("category", "")
+    limit = request.GET.get("limit")
+    return {
+        "category_id": int(category_id) if category_id.isdigit() else None,
+        "limit": get_tag_limit(limit) if search.strip() or limit else None,
+    }
 
-    if category_id:
-        tags = tags.filter(category_id=category_id)
-    
-    if search:
-        tags = tags.filter(name__icontains=search)
 
-    tags = tags.order_by("name")
+@login_required
+async def get_tags_by_category(request):
+    search = request.GET.get("search", "")
+
+    # l'index est reconstruit depuis le cache (voire la base) quand il a changé
+    index = await sync_to_async(get_tag_index)()
+    tags = index.search(search, **_tag_filters(request, search))
 
     return JsonResponse({
-        "tags": [{"id": t.id, "name": t.name} for t in tags]
+        "tags": [{"id": t.id, "name": t.name, "category": t.category} for t in tags]
     })
 
 
-def get_all_tags(request):
+async def get_all_tags(request):
     search = request.GET.get("search", "")
 
-    tags = Tag.objects.all()
-
-    if search:
-        tags = tags.filter(name__icontains=search)
+    index = await sync_to_async(get_tag_index)()
+    tags = index.search(search, **_tag_filters(request, search))
 
     data = [
         {
             "id": tag.id,
             "name": tag.name,
-            "category": tag.category.name if tag.category else ""
+            "category": tag.category,
+            "popularity": tag.popularity,
         }
         for tag in tags
     ]
@@ -110,29 +195,40 @@ def get_all_tags(request):
     return JsonResponse({"tags": data})
 
 
+def _publish_image(request, form):
+    """Enregistrer une image validée par ImageUploadForm (envoi classique ou par morceaux)"""
+    image = form.save(commit=False)
+    image.author = request.user
+
+    # Récupération de la catégorie choisie
+    category_id = request.POST.get("category")
+    if category_id:
+        image.category = Category.objects.get(id=category_id)
+
+    image.save()
+
+    # Récupération des tags
+    tags_ids = request.POST.get("tags_ids", "")
+    if tags_ids:
+        tag_ids_list = [int(t) for t in tags_ids.split(",") if t.isdigit()]
+        image.tags.set(tag_ids_list)
+
+    # signaler les doublons (exacts ou visuellement proches) déjà publiés
+    near = find_near_duplicates(image)
+    if near:
+        titles = ", ".join(f"« {other.title} » ({other.author.username})" for _, other in near[:5])
+        messages.warning(request, f"Cette image ressemble à des images déjà publiées : {titles}")
+    return image
+
+
 @login_required
 def upload_image(request):
-    categories = Category.objects.all()
+    categories = get_categories()
 
     if request.method == "POST":
         form = ImageUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            image = form.save(commit=False)
-            image.author = request.user
-
-            # Récupération de la catégorie choisie
-            category_id = request.POST.get("category")
-            if category_id:
-                image.category = Category.objects.get(id=category_id)
-
-            image.save()
-
-            # Récupération des tags
-            tags_ids = request.POST.get("tags_ids", "")
-            if tags_ids:
-                tag_ids_list = [int(t) for t in tags_ids.split(",") if t.isdigit()]
-                image.tags.set(tag_ids_list)
-
+            _publish_image(request, form)
             return redirect("index")
 
     else:
@@ -144,6 +240,80 @@ def upload_image(request):
     })
 
 
+# Envoi par morceaux avec reprise (voir gallery/uploads.py)
+
+@login_required
+@require_POST
+def upload_session_create(request):
+    """Ouvrir une session d'envoi : filename et size (octets) annoncés"""
+    try:
+        size = int(request.POST.get("size", ""))
+        check_declared_size(size)
+    except ValueError:
+        return JsonResponse({'error': 'Taille invalide'}, status=400)
+    except UploadRejected as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+
+    filename = os.path.basename(request.POST.get("filename", "")).strip()[:255]
+    if not filename:
+        return JsonResponse({'error': 'Nom de fichier manquant'}, status=400)
+
+    session = UploadSession.objects.create(user=request.user, filename=filename, size=size)
+    return JsonResponse({
+        'id': str(session.pk),
+        'offset': 0,
+        'chunk_size': get_chunk_size(),
+    }, status=201)
+
+
+@login_required
+def upload_session_chunk(request, session_id):
+    """GET : offset confirmé (reprise) ; POST : morceau brut à l'offset Upload-Offset"""
+    session = get_object_or_404(UploadSession, pk=session_id, user=request.user)
+
+    if request.method == "POST":
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            append_chunk(session, offset, request)
+        except ValueError:
+            return JsonResponse({'error': 'En-tête Upload-Offset invalide'}, status=400)
+        except UploadRejected as exc:
+            if exc.status == 409:
+                session.refresh_from_db(fields=['offset'])
+            return JsonResponse({'error': str(exc), 'offset': session.offset}, status=exc.status)
+    elif request.method != "GET":
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
+
+    return JsonResponse({
+        'offset': session.offset,
+        'size': session.size,
+        'complete': session.is_complete,
+    })
+
+
+@login_required
+@require_POST
+def upload_session_complete(request, session_id):
+    """Publier l'image d'une session complète avec les champs du formulaire"""
+    session = get_object_or_404(UploadSession, pk=session_id, user=request.user)
+    if not session.is_complete:
+        return JsonResponse({'error': 'Envoi incomplet', 'offset': session.offset}, status=409)
+
+    with open(session.temp_path, 'rb') as f:
+        upload = UploadedFile(f, name=session.filename, content_type=session.content_type, size=session.size)
+        form = ImageUploadForm(request.POST, {'image': upload})
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        image = _publish_image(request, form)
+    session.discard()
+
+    return JsonResponse({
+        'slug': image.slug,
+        'url': reverse('image_detail', args=[image.slug]),
+        'redirect': reverse('index'),
+    }, status=201)
+
+
 
 @login_required
 def logout_view(request):
@@ -162,44 +332,75 @@ def get_client_ip(request):
     return ip
 
 
+def _comments_page(image_id, cursor=None):
+    """Page de commentaires (récents d'abord) + curseur suivant.
+
+    Auteur et avatar viennent de la même requête (jointure sur le profil).
+    Lève InvalidCursor si le curseur est illisible.
+    """
+    comments = (
+        Comment.objects.filter(image_id=image_id)
+        .select_related('author__profile')
+        .only('id', 'content', 'created_at', 'image_id', 'author_id',
+              'author__username', 'author__profile__id', 'author__profile__avatar')
+    )
+    return keyset_page(comments, cursor, get_comments_page_size())
+
+
+def _comment_data(comment, user):
+    profile = getattr(comment.author, 'profile', None)
+    return {
+        'id': comment.id,
+        'author': comment.author.username,
+        'avatar': profile.avatar.url if profile and profile.avatar else None,
+        'content': comment.content,
+        'created_at': timezone.localtime(comment.created_at).strftime('%d/%m/%Y à %H:%M'),
+        'can_delete': comment.author_id == user.pk,
+    }
+
+
 def image_detail(request, slug):
     """Page de détail d'une image"""
-    image = get_object_or_404(Image, slug=slug)
-    
-    # Enregistrer une vue (une seule par utilisateur/IP par image)
-    ip_address = get_client_ip(request)
-    if request.user.is_authenticated:
-        ImageView.objects.get_or_create(image=image, user=request.user)
-    else:
-        # Pour les utilisateurs non connectés, une vue par IP
-        ImageView.objects.get_or_create(image=image, ip_address=ip_address)
-    
-    # Récupérer les commentaires
-    comments = image.comments.select_related('author').all()
-    
-    # Trouver des images similaires
-    similar_images = Image.objects.filter(
-        category=image.category
-    ).exclude(id=image.id)
-    
-    # Ajouter les images avec des tags en commun
-    image_tags = image.tags.all()
-    if image_tags.exists():
-        # Utiliser Q objects pour combiner les conditions
-        from django.db.models import Q
-        
-        similar_images = Image.objects.filter(
-            Q(category=image.category) | Q(tags__in=image_tags)
-        ).exclude(id=image.id).distinct()
-    
-    # Limiter à 6 images similaires et annoter avec le nombre de likes
-    similar_images = similar_images.annotate(
-        likes_count=Count('likes')
-    ).order_by('-likes_count', '-created_at')[:6]
+    cacheable = pagecache.is_cacheable(request)
+    image = get_object_or_404(Image.objects.only('pk') if cacheable else Image, slug=slug)
+    
+    # Enregistrer une vue (une seule par utilisateur/IP par image),
+    # écrite en différé par lots (voir gallery/viewtracking.py),
+    # même quand la page vient du cache
+    record_view(image, request.user, get_client_ip(request))
+    
+    if cacheable:
+        # visiteurs anonymes : page versionnée par image (voir gallery/pagecache.py)
+        return pagecache.serve(
+            request, (pagecache.image_namespace(image.pk),),
+            lambda: _render_image_detail(request, get_object_or_404(Image, pk=image.pk)),
+        )
+    return _render_image_detail(request, image)
+
+
+def _render_image_detail(request, image):
+    # Première page des commentaires ; la suite via comments_page (JSON)
+    comments, comments_cursor = _comments_page(image.pk)
+    
+    # Images similaires précalculées (voir gallery/similarity.py)
+    similar_images = list(
+        Image.objects.filter(similar_to_links__image=image)
+        .prefetch_related('renditions')
+        .order_by('-similar_to_links__score')[:6]
+    )
+    if not similar_images and image.category_id:
+        # pas encore calculées (image toute neuve) : les plus aimées de la catégorie
+        similar_images = (
+            Image.objects.filter(category_id=image.category_id)
+            .exclude(id=image.id)
+            .prefetch_related('renditions')
+            .order_by('-likes_count', '-created_at')[:6]
+        )
     
     context = {
         'image': image,
         'comments': comments,
+        'comments_cursor': comments_cursor,
         'similar_images': similar_images,
         'is_liked': image.is_liked_by(request.user),
         'likes_count': image.get_likes_count(),
@@ -212,48 +413,113 @@ def image_detail(request, slug):
 
 @require_POST
 @login_required
-def toggle_like(request, slug):
-    """Toggle like/unlike d'une image"""
-    image = get_object_or_404(Image, slug=slug)
-    
-    like, created = ImageLike.objects.get_or_create(image=image, user=request.user)
-    
-    if not created:
-        # Le like existait déjà, on le supprime
-        like.delete()
-        liked = False
-    else:
-        liked = True
-    
+async def toggle_like(request, slug):
+    """Toggle like/unlike d'une image (voir gallery/likes.py)"""
+    user = await request.auser()
+    image = await aget_object_or_404(Image.objects.only('pk', 'author_id'), slug=slug)
+
+    # une seule transaction, donc un seul passage par le thread de sync_to_async
+    liked, likes_count = await sync_to_async(likes.toggle_like)(image, user)
     return JsonResponse({
         'liked': liked,
-        'likes_count': image.get_likes_count()
+        'likes_count': likes_count
+    })
+
+
+async def like_states(request):
+    """État des likes de l'utilisateur et compteurs pour ?slugs=a,b,c (pages de liste)"""
+    user = await request.auser()
+    slugs = [s for s in request.GET.get('slugs', '').split(',') if s]
+    states = await sync_to_async(likes.like_states)(slugs, user)
+    return JsonResponse({'images': states})
+
+
+def _invalid_fields(error):
+    return JsonResponse({'error': f'Champs inconnus : {error}', 'fields': list(api.FIELDS)}, status=400)
+
+
+@require_safe
+def api_images(request):
+    """Images par curseur (?cursor=, ?limit=, ?category=) ou par lot (?slugs=a,b,c)"""
+    try:
+        fields = api.parse_fields(request.GET.get('fields'))
+    except api.InvalidFields as error:
+        return _invalid_fields(error)
+    images = api.select_fields(Image.objects.all(), fields)
+
+    slugs = request.GET.get('slugs')
+    if slugs is not None:
+        # dans l'ordre demandé, sans les slugs inconnus
+        slugs = list(dict.fromkeys(s for s in slugs.split(',') if s))[:api.MAX_BATCH]
+        found = {image.slug: image for image in images.filter(slug__in=slugs)}
+        return api.json_response(request, {
+            'images': [api.serialize(found[slug], fields, request) for slug in slugs if slug in found],
+        })
+
+    category_slug = request.GET.get('category')
+    if category_slug:
+        category = get_category(category_slug)
+        if category is None:
+            return JsonResponse({'error': 'Catégorie introuvable'}, status=404)
+        images = images.filter(category=category)
+
+    try:
+        page, next_cursor = keyset_page(images, request.GET.get('cursor'), request.GET.get('limit'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Curseur invalide'}, status=400)
+    return api.json_response(request, {
+        'images': [api.serialize(image, fields, request) for image in page],
+        'next_cursor': next_cursor,
+    })
+
+
+@require_safe
+def api_image(request, slug):
+    """Une image, avec les mêmes champs que api_images"""
+    try:
+        fields = api.parse_fields(request.GET.get('fields'))
+    except api.InvalidFields as error:
+        return _invalid_fields(error)
+    image = api.select_fields(Image.objects.filter(slug=slug), fields).first()
+    if image is None:
+        return JsonResponse({'error': 'Image introuvable'}, status=404)
+    return api.json_response(request, api.serialize(image, fields, request))
+
+
+async def comments_page(request, slug):
+    """Commentaires suivants d'une image, par curseur (?cursor=)"""
+    user = await request.auser()
+    image = await aget_object_or_404(Image.objects.only('pk'), slug=slug)
+    try:
+        comments, next_cursor = await sync_to_async(_comments_page)(image.pk, request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Curseur invalide'}, status=400)
+    return JsonResponse({
+        'comments': [_comment_data(comment, user) for comment in comments],
+        'next_cursor': next_cursor,
     })
 
 
 @require_POST
 @login_required
-def add_comment(request, slug):
+async def add_comment(request, slug):
     """Ajouter un commentaire"""
-    image = get_object_or_404(Image, slug=slug)
+    user = await request.auser()
+    image = await aget_object_or_404(Image, slug=slug)
     content = request.POST.get('comment-content', '').strip()
     
     if content:
-        comment = Comment.objects.create(
+        comment = await Comment.objects.acreate(
             image=image,
-            author=request.user,
+            author=user,
             content=content
         )
+        await image.arefresh_from_db(fields=['comments_count'])
         
         return JsonResponse({
             'success': True,
-            'comment': {
-                'id': comment.id,
-                'author': comment.author.username,
-                'content': comment.content,
-                'created_at': comment.created_at.strftime('%d/%m/%Y à %H:%M'),
-                'can_delete': True
-            },
+            # le profil (avatar) est lu en base : hors de la boucle d'événements
+            'comment': await sync_to_async(_comment_data)(comment, user),
             'comments_count': image.get_comments_count()
         })
     
@@ -262,21 +528,22 @@ def add_comment(request, slug):
 
 @require_POST
 @login_required
-def delete_comment(request, comment_id):
+async def delete_comment(request, comment_id):
     """Supprimer un commentaire"""
-    comment = get_object_or_404(Comment, id=comment_id)
+    user = await request.auser()
+    comment = await aget_object_or_404(Comment.objects.select_related('image'), id=comment_id)
     
     # Vérifier que l'utilisateur est l'auteur
-    if comment.author != request.user:
+    if comment.author_id != user.pk:
         return JsonResponse({'success': False, 'error': 'Non autorisé'}, status=403)
     
-    image_slug = comment.image.slug
-    comments_count = comment.image.get_comments_count() - 1
-    comment.delete()
+    image = comment.image
+    await comment.adelete()
+    await image.arefresh_from_db(fields=['comments_count'])
     
     return JsonResponse({
         'success': True,
-        'comments_count': comments_count
+        'comments_count': image.get_comments_count()
     })
 
 
@@ -287,74 +554,29 @@ def profile_view(request):
     profile = user.profile
     
     # Images de l'utilisateur
-    user_images = Image.objects.filter(author=user).order_by('-created_at')
-    
-    # Statistiques globales
-    total_images = user_images.count()
-    total_views = sum(img.get_views_count() for img in user_images)
-    total_likes = sum(img.get_likes_count() for img in user_images)
-    total_comments = sum(img.get_comments_count() for img in user_images)
-    
-    # Statistiques des 30 derniers jours
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    
-    recent_images = user_images.filter(created_at__gte=thirty_days_ago)
-    recent_images_count = recent_images.count()
-    
-    # Calcul des likes des 30 derniers jours
-    recent_likes = ImageLike.objects.filter(
-        image__author=user,
-        created_at__gte=thirty_days_ago
-    ).count()
-    
-    # Calcul des commentaires des 30 derniers jours
-    recent_comments = Comment.objects.filter(
-        image__author=user,
-        created_at__gte=thirty_days_ago
-    ).count()
-    
-    # Calcul des vues des 30 derniers jours
-    recent_views = ImageView.objects.filter(
-        image__author=user,
-        viewed_at__gte=thirty_days_ago
-    ).count()
-    
-    # Calcul des followers (nombre de personnes qui ont liké vos images)
-    unique_likers = ImageLike.objects.filter(
-        image__author=user
-    ).values('user').distinct().count()
-    
-    # Calcul de la croissance (simulée pour l'exemple)
-    # Vous pouvez améliorer cela en comparant avec les 30 jours précédents
-    images_growth = 0
-    if total_images > 0:
-        old_images = user_images.filter(created_at__lt=thirty_days_ago).count()
-        if old_images > 0:
-            images_growth = ((recent_images_count - old_images) / old_images) * 100
-    
-    likes_growth = 0
-    if total_likes > 0:
-        old_likes = ImageLike.objects.filter(
-            image__author=user,
-            created_at__lt=thirty_days_ago
-        ).count()
-        if old_likes > 0:
-            likes_growth = ((recent_likes - old_likes) / old_likes) * 100
+    user_images = Image.objects.filter(author=user).prefetch_related('renditions').order_by('-created_at')
     
+    # Statistiques : sommes sur la table quotidienne AuthorDailyStats,
+    # totaux + 30 derniers jours + 30 jours précédents en une requête
+    stats = author_stats(user, period=30)
+    total, recent, growth = stats['total'], stats['recent'], stats['growth']
+
     context = {
         'profile': profile,
         'user_images': user_images,
-        'total_images': total_images,
-        'total_views': total_views,
-        'total_likes': total_likes,
-        'total_comments': total_comments,
-        'recent_images_count': recent_images_count,
-        'recent_likes': recent_likes,
-        'recent_comments': recent_comments,
-        'recent_views': recent_views,
-        'unique_likers': unique_likers,
-        'images_growth': round(images_growth, 1),
-        'likes_growth': round(likes_growth, 1),
+        'total_images': total['images'],
+        'total_views': total['views'],
+        'total_likes': total['likes'],
+        'total_comments': total['comments'],
+        'recent_images_count': recent['images'],
+        'recent_likes': recent['likes'],
+        'recent_comments': recent['comments'],
+        'recent_views': recent['views'],
+        'unique_likers': total['new_likers'],
+        'images_growth': round(growth['images'] or 0, 1),
+        'likes_growth': round(growth['likes'] or 0, 1),
+        'comments_growth': round(growth['comments'] or 0, 1),
+        'views_growth': round(growth['views'] or 0, 1),
     }
     
     return render(request, 'gallery/profile.html', context)
@@ -410,7 +632,7 @@ def delete_image(request, slug):
 def edit_image(request, slug):
     """Modifier une image"""
     image = get_object_or_404(Image, slug=slug, author=request.user)
-    categories = Category.objects.all()
+    categories = get_categories()
     
     if request.method == 'POST':
         form = ImageUploadForm(request.POST, request.FILES, instance=image)
@@ -442,4 +664,12 @@ def edit_image(request, slug):
         'form': form, 
         'image': image,
         'categories': categories
-    })
\ No newline at end of file
+    })
+
+
+@staff_member_required
+def instrumentation_stats(request):
+    """Histogrammes par vue du processus courant (voir gallery/instrumentation.py)"""
+    if request.GET.get('reset'):
+        instrumentation.registry.reset()
+    return JsonResponse(instrumentation.snapshot())
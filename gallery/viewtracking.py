@@ -0,0 +1,191 @@
+"""Suivi des vues en écriture différée (write-behind).
+
+image_detail ne touche plus la base : chaque vue est ajoutée à un tampon
+en mémoire du processus, vidé par un thread en arrière-plan toutes les
+GALLERY_VIEW_FLUSH_INTERVAL secondes ou dès GALLERY_VIEW_BUFFER_SIZE
+événements, avec un seul bulk_create par lot.
+
+Avec GALLERY_VIEW_TRACKING = 'hll', les visiteurs anonymes ne créent plus
+de ligne ImageView : leur IP alimente un sketch HyperLogLog par image.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import rollups
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 10  # secondes ; 0 = écriture immédiate (tests)
+
+
+def tracking_mode():
+    return getattr(settings, 'GALLERY_VIEW_TRACKING', 'rows')
+
+
+def write_views(events):
+    """Écrire un lot d'événements (image_id, user_id, ip_address) dédoublonnés.
+
+    Les vues déjà connues sont ignorées, les nouvelles insérées en une fois,
+    puis views_count est incrémenté par image. Retourne le nombre de vues
+    ajoutées (estimation pour les sketches).
+    """
+    from .models import Image, ImageView, ImageViewSketch
+
+    image_ids = {image_id for image_id, _, _ in events}
+    authors = dict(Image.objects.filter(pk__in=image_ids).values_list('pk', 'author_id'))
+    alive = set(authors)
+
+    user_events = {(i, u) for i, u, _ in events if u and i in alive}
+    anon_events = {(i, ip) for i, u, ip in events if not u and ip and i in alive}
+    added = defaultdict(int)
+
+    with transaction.atomic():
+        if user_events:
+            existing = set(ImageView.objects.filter(
+                image_id__in={i for i, _ in user_events},
+                user_id__in={u for _, u in user_events},
+            ).order_by().values_list('image_id', 'user_id'))
+            new = user_events - existing
+            ImageView.objects.bulk_create(
+                [ImageView(image_id=i, user_id=u) for i, u in new],
+                ignore_conflicts=True,
+            )
+            for i, _ in new:
+                added[i] += 1
+
+        if anon_events and tracking_mode() == 'hll':
+            ips_by_image = defaultdict(set)
+            for i, ip in anon_events:
+                ips_by_image[i].add(ip)
+            sketches = {
+                s.image_id: s for s in
+                ImageViewSketch.objects.select_for_update().filter(image_id__in=ips_by_image)
+            }
+            for i, ips in ips_by_image.items():
+                sketch = sketches.get(i) or ImageViewSketch(image_id=i)
+                hll = sketch.get_hll()
+                before = hll.estimate()
+                for ip in ips:
+                    hll.add(ip)
+                sketch.registers = hll.to_bytes()
+                sketch.save()
+                added[i] += max(0, hll.estimate() - before)
+
+        elif anon_events:
+            existing = set(ImageView.objects.filter(
+                image_id__in={i for i, _ in anon_events},
+                ip_address__in={ip for _, ip in anon_events},
+                user__isnull=True,
+            ).order_by().values_list('image_id', 'ip_address'))
+            new = anon_events - existing
+            ImageView.objects.bulk_create(
+                [ImageView(image_id=i, ip_address=ip) for i, ip in new],
+                ignore_conflicts=True,
+            )
+            for i, _ in new:
+                added[i] += 1
+
+        # une requête UPDATE par valeur d'incrément, pas par image
+        by_delta = defaultdict(list)
+        for i, delta in added.items():
+            if delta:
+                by_delta[delta].append(i)
+        for delta, ids in by_delta.items():
+            Image.objects.filter(pk__in=ids).update(views_count=F('views_count') + delta)
+
+        by_author = defaultdict(int)
+        for i, delta in added.items():
+            by_author[authors[i]] += delta
+        today = rollups.day_of()
+        for author_id, delta in by_author.items():
+            rollups.bump(author_id, today, views=delta)
+
+    return sum(added.values())
+
+
+class ViewBuffer:
+    """Tampon de vues propre au processus, vidé par un thread démon"""
+
+    def __init__(self):
+        self._events = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'GALLERY_VIEW_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'GALLERY_VIEW_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, image_id, user_id=None, ip_address=None):
+        with self._lock:
+            self._events.add((image_id, user_id, ip_address))
+            full = len(self._events) >= self.max_size
+
+        if not self.interval:
+            self.flush()
+            return
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def drain(self):
+        with self._lock:
+            events, self._events = self._events, set()
+        return events
+
+    def flush(self):
+        """Écrire tout le contenu du tampon ; retourne le nombre de vues ajoutées"""
+        with self._flush_lock:
+            events = self.drain()
+            if not events:
+                return 0
+            try:
+                return write_views(events)
+            except Exception:
+                logger.exception("Échec de l'écriture de %d vue(s)", len(events))
+                # on remet les événements pour le prochain passage
+                with self._lock:
+                    self._events |= events
+                return 0
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='view-buffer-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+            # ce thread a sa propre connexion : ne pas la garder ouverte
+            connection.close()
+
+
+view_buffer = ViewBuffer()
+atexit.register(view_buffer.flush)
+
+
+def record_view(image, user=None, ip_address=None):
+    """Enregistrer une vue sans écriture synchrone en base"""
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    view_buffer.add(image.pk, user_id, None if user_id else ip_address)
@@ -43,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'gallery.instrumentation.InstrumentationMiddleware',  # Server-Timing, /api/debug/timings/
+    'gallery.routers.ReplicaRoutingMiddleware',  # lectures sur les répliques (avant les sessions)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,8 +87,16 @@ DATABASES = {
         'PASSWORD': '',
         'HOST': 'localhost', 
         'PORT': '3306', 
-    }
+    },
+    # réplique en lecture, à déclarer aussi dans GALLERY_READ_REPLICAS :
+    # 'replica': {
+    #     'ENGINE': 'django.db.backends.mysql',
+    #     'NAME': 'gallery_db',
+    #     'HOST': 'replica.local',
+    #     'TEST': {'MIRROR': 'default'},
+    # },
 }
+DATABASE_ROUTERS = ['gallery.routers.PrimaryReplicaRouter']
 
 
 # Password validation
@@ -144,3 +154,45 @@ LOGOUT_REDIRECT_URL = 'index'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Cache (gallery/cache.py) : locmem par défaut ; avec plusieurs processus,
+# le backend fichier partage les générations entre eux :
+# 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+# 'LOCATION': os.path.join(BASE_DIR, 'cache'),
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mygallery',
+    }
+}
+
+# Galerie
+GALLERY_PAGE_SIZE = 30
+GALLERY_COMMENTS_PAGE_SIZE = 20  # commentaires par page sur image_detail
+GALLERY_CACHE_TIMEOUT = 300  # secondes ; borne le retard des autres processus avec locmem
+GALLERY_PAGE_CACHE = True  # pages complètes des visiteurs anonymes (gallery/pagecache.py)
+GALLERY_PAGE_CACHE_TIMEOUT = 60  # secondes ; borne aussi le retard des compteurs de vues
+GALLERY_RENDITION_WIDTHS = (320, 640, 1280)
+GALLERY_SEARCH_MAX_RESULTS = 1000  # résultats classés retenus par recherche
+GALLERY_SEARCH_MIN_TOKEN_SIZE = 3  # MySQL : doit valoir innodb_ft_min_token_size
+GALLERY_TAG_AUTOCOMPLETE_LIMIT = 20
+GALLERY_TAG_INDEX_TTL = 300  # secondes avant de rafraîchir la popularité des tags
+GALLERY_DUPLICATE_DISTANCE = 6  # bits de dHash différents tolérés pour un quasi-doublon
+GALLERY_MEDIA_MAX_AGE = 30 * 24 * 3600  # Cache-Control des fichiers de MEDIA_ROOT
+# En production derrière nginx, déléguer l'envoi des fichiers :
+# GALLERY_MEDIA_SENDFILE = 'x-accel-redirect'  # ou 'x-sendfile' (Apache)
+# GALLERY_MEDIA_ACCEL_PREFIX = '/protected-media/'  # location internal; alias MEDIA_ROOT
+# GALLERY_MEDIA_ACCESS_CHECK = 'chemin.vers.fonction'  # (request, path) -> bool
+GALLERY_INSTRUMENTATION = True  # compteurs SQL/gabarits par requête (gallery/instrumentation.py)
+GALLERY_INSTRUMENTATION_WINDOW = 15  # minutes d'historique par vue
+GALLERY_DUPLICATE_SQL_THRESHOLD = 5  # même SQL n fois dans une requête : N+1 journalisé
+
+# Suivi des vues en écriture différée (gallery/viewtracking.py)
+GALLERY_VIEW_TRACKING = 'rows'  # 'hll' : sketch HyperLogLog pour les visiteurs anonymes
+GALLERY_VIEW_BUFFER_SIZE = 500
+GALLERY_VIEW_FLUSH_INTERVAL = 10  # secondes
+GALLERY_VIEW_RETENTION_DAYS = 90  # au-delà, prune_image_views compacte les vues par jour
+
+# Répliques en lecture (gallery/routers.py)
+GALLERY_READ_REPLICAS = []  # alias de DATABASES, ex. ['replica']
+GALLERY_REPLICA_STICKY_SECONDS = 15  # après une écriture, le visiteur lit le primaire
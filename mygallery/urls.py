@@ -1,12 +1,18 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from gallery import media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('gallery.urls')),  # tu créeras gallery/urls.py
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# médias servis par Django (ou délégués au serveur avec GALLERY_MEDIA_SENDFILE),
+# en debug comme en production, sauf si MEDIA_URL pointe vers un autre domaine
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), media.serve, name='media'),
+    ]